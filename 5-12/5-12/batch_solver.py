@@ -0,0 +1,116 @@
+# batch_solver.py
+import numpy as np
+from board import Board
+from sudoku import DIGITS, _ROW, _COL, _BOX, _UNITS, _BIT_COUNT, _BIT_DIGIT, solve_sudoku
+
+# Per-board status codes returned by solve_sudoku_batch
+STATUS_NO_SOLUTION = 0
+STATUS_PROPAGATED = 1
+STATUS_SEARCHED = 2
+
+_BATCH_BRANCH_DEPTH = 6
+_BATCH_BRANCH_LIMIT = 1 << 16
+
+_UNIT_INDEX = np.array(_UNITS)
+_CELL_UNITS = (np.array(_ROW), np.array(_COL), np.array(_BOX))
+_BIT_COUNT_TABLE = np.array(_BIT_COUNT, dtype=np.uint8)
+_BIT_DIGIT_TABLE = np.zeros(1 << 10, dtype=np.uint8)
+for _bit, _digit in _BIT_DIGIT.items():
+    _BIT_DIGIT_TABLE[_bit] = _digit
+
+def _batch_candidates(cells):
+    row, col, box = _CELL_UNITS
+    empty = cells == 0
+    bits = np.where(empty, 0, np.left_shift(1, cells, dtype=np.uint16))
+    unit_bits = bits[:, _UNIT_INDEX]
+    used = np.bitwise_or.reduce(unit_bits, axis=2)
+    duplicate = (_BIT_COUNT_TABLE[used] != (unit_bits != 0).sum(axis=2)).any(axis=1)
+    cand = np.where(empty, DIGITS & ~(used[:, row] | used[:, col] | used[:, box]), 0).astype(np.uint16)
+    return empty, used, cand, duplicate
+
+def _branch_batch(states):
+    # Split every state on its most constrained cell, one child per candidate digit
+    empty, _, cand, _ = _batch_candidates(states)
+    cell = np.where(empty, _BIT_COUNT_TABLE[cand], 10).argmin(axis=1)
+    cell_cand = cand[np.arange(len(states)), cell]
+    parent, digit = np.nonzero((cell_cand[:, None] >> np.arange(1, 10, dtype=np.uint16)) & 1)
+    children = states[parent]
+    children[np.arange(len(children)), cell[parent]] = digit + 1
+    return parent, children
+
+def _propagate_batch(cells):
+    # Vectorized naked/hidden singles over an (n, 81) uint8 array, in place. Returns a per-board ok mask
+    row, col, box = _CELL_UNITS
+    ok = np.ones(len(cells), dtype=bool)
+    active = np.arange(len(cells))
+    while len(active):
+        work = cells[active]
+        empty, used, cand, duplicate = _batch_candidates(work)
+        dead_cell = (empty & (cand == 0)).any(axis=1)
+
+        # Digits seen once/more than once among each unit's candidates
+        unit_cand = cand[:, _UNIT_INDEX]
+        once = np.zeros_like(used)
+        twice = np.zeros_like(used)
+        for k in range(9):
+            twice |= once & unit_cand[:, :, k]
+            once |= unit_cand[:, :, k]
+        dead_digit = ((once | used) != DIGITS).any(axis=1)
+        hidden = once & ~twice
+
+        naked = _BIT_COUNT_TABLE[cand] == 1
+        forced = np.where(naked, cand, (hidden[:, row] | hidden[:, col] | hidden[:, box]) & cand)
+        clash = (_BIT_COUNT_TABLE[forced] > 1).any(axis=1)
+
+        failed = duplicate | dead_cell | dead_digit | clash
+        ok[active[failed]] = False
+
+        assign = (forced != 0) & ~failed[:, None]
+        progressed = assign.any(axis=1)
+        work[assign] = _BIT_DIGIT_TABLE[forced[assign]]
+        cells[active] = work
+        active = active[progressed]
+    return ok
+
+def solve_sudoku_batch(boards, chunk_size=4096):
+    boards = np.asarray(boards, dtype=np.uint8)
+    if boards.ndim != 3 or boards.shape[1:] != (9, 9):
+        raise ValueError(f"expected an (N, 9, 9) array of boards, got shape {boards.shape}")
+    if (boards > 9).any():
+        raise ValueError("board values must be between 0 and 9")
+
+    cells = boards.reshape(len(boards), 81).copy()
+    status = np.full(len(boards), STATUS_NO_SOLUTION, dtype=np.uint8)
+    for start in range(0, len(cells), chunk_size):
+        chunk = cells[start:start + chunk_size]
+        ok = _propagate_batch(chunk)
+        filled = ok & (chunk != 0).all(axis=1)
+        status[start:start + chunk_size][filled] = STATUS_PROPAGATED
+
+        # Guess vectorized for a few levels, then fall back to scalar search per board
+        pending = np.nonzero(ok & ~filled)[0]
+        owner, states = pending, chunk[pending]
+        for _ in range(_BATCH_BRANCH_DEPTH):
+            if not len(states) or len(states) > _BATCH_BRANCH_LIMIT:
+                break
+            parent, states = _branch_batch(states)
+            owner = owner[parent]
+            alive = _propagate_batch(states)
+            done = alive & (states != 0).all(axis=1)
+            for i, solution in zip(owner[done], states[done]):
+                if status[start + i] == STATUS_NO_SOLUTION:
+                    chunk[i] = solution
+                    status[start + i] = STATUS_SEARCHED
+            keep = alive & ~done & (status[start + owner] == STATUS_NO_SOLUTION)
+            owner, states = owner[keep], states[keep]
+
+        for i in pending[status[start + pending] == STATUS_NO_SOLUTION]:
+            board = Board(chunk[i].tobytes())
+            if solve_sudoku(board):
+                chunk[i] = np.frombuffer(board.cells, dtype=np.uint8)
+                status[start + i] = STATUS_SEARCHED
+
+    solved = cells.reshape(boards.shape)
+    unsolved = status == STATUS_NO_SOLUTION
+    solved[unsolved] = boards[unsolved]
+    return solved, status
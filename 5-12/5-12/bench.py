@@ -0,0 +1,391 @@
+# bench.py
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+import numpy as np
+from sudoku import generate_sudoku_board, count_solutions, solve_sudoku
+from batch_solver import solve_sudoku_batch
+from board import Board
+from user_registry import UserRegistry
+
+def timed(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times
+
+def report(name, times):
+    mean = sum(times) / len(times)
+    print(f"{name:<32} mean {mean * 1000:8.2f} ms   median {times[len(times) // 2] * 1000:8.2f} ms   max {times[-1] * 1000:8.2f} ms")
+
+def bench_generate(args):
+    for difficulty in ("easy", "medium", "hard"):
+        report(f"generate {difficulty} (unique)", timed(lambda: generate_sudoku_board(difficulty), args.repeat))
+
+    boards = [generate_sudoku_board("hard") for _ in range(args.repeat)]
+    blanks = [board.empty_count() for board in boards]
+    print(f"hard boards: {min(blanks)}-{max(blanks)} blanks, mean {sum(blanks) / len(blanks):.1f}")
+    boards = iter(boards)
+    report("count_solutions hard board", timed(lambda: count_solutions(next(boards)), args.repeat))
+
+def puzzle_batch(n, seed=0):
+    # Relabel digits of a small set of unique puzzles so every board differs but stays unique
+    rng = np.random.default_rng(seed)
+    base = np.array([generate_sudoku_board(difficulty).to_rows() for difficulty in ("easy", "medium", "hard") * 100], dtype=np.uint8)
+    relabel = np.zeros((n, 10), dtype=np.uint8)
+    relabel[:, 1:] = rng.permuted(np.tile(np.arange(1, 10, dtype=np.uint8), (n, 1)), axis=1)
+    picks = rng.integers(len(base), size=n)
+    return relabel[np.arange(n)[:, None, None], base[picks]]
+
+def bench_batch(args):
+    for n in args.sizes:
+        boards = puzzle_batch(n)
+
+        start = time.perf_counter()
+        solved, status = solve_sudoku_batch(boards)
+        batch_time = time.perf_counter() - start
+
+        # Scalar solver is timed on a sample and scaled up for large N
+        sample = boards[:min(n, args.scalar_limit)]
+        start = time.perf_counter()
+        for board in sample:
+            solve_sudoku(Board(board.tobytes()))
+        scalar_time = (time.perf_counter() - start) * n / len(sample)
+        note = "" if len(sample) == n else f" (extrapolated from {len(sample)})"
+
+        counts = np.bincount(status, minlength=3)
+        print(f"N={n:>7}  batch {batch_time:8.2f} s   scalar {scalar_time:8.2f} s{note}   "
+              f"speedup {scalar_time / batch_time:5.1f}x   propagated {counts[1]} searched {counts[2]} unsolved {counts[0]}")
+
+def symmetric_batch(n, base_count, seed=0):
+    # Random symmetry variants (transpose, band/row and stack/column swaps, relabeling) of a few puzzles
+    rng = np.random.default_rng(seed)
+    base = np.array([generate_sudoku_board(difficulty).to_rows() for difficulty in ("easy", "medium", "hard") * (base_count // 3)], dtype=np.uint8)
+    boards = base[rng.integers(len(base), size=n)]
+    flip = rng.random(n) < 0.5
+    boards[flip] = boards[flip].transpose(0, 2, 1)
+
+    def lines():
+        bands = rng.permuted(np.tile(np.arange(3), (n, 1)), axis=1)
+        within = rng.permuted(np.tile(np.arange(3), (n, 3, 1)), axis=2)
+        return (bands[:, :, None] * 3 + within).reshape(n, 9)
+
+    rows, cols = lines(), lines()
+    boards = boards[np.arange(n)[:, None, None], rows[:, :, None], cols[:, None, :]]
+    relabel = np.zeros((n, 10), dtype=np.uint8)
+    relabel[:, 1:] = rng.permuted(np.tile(np.arange(1, 10, dtype=np.uint8), (n, 1)), axis=1)
+    return relabel[np.arange(n)[:, None, None], boards], len(base)
+
+def canonical_keys(boards):
+    from canonical import canonical_key
+    return [canonical_key(Board(board.tobytes())) for board in boards]
+
+def bench_canonical(args):
+    # Duplicate detection: every board is a disguised copy of one of a few hundred puzzles
+    from canonical import CanonicalIndex
+
+    for n in args.sizes:
+        boards, originals = symmetric_batch(n, 300)
+
+        start = time.perf_counter()
+        keys = canonical_keys(boards)
+        canonical_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        with Pool(args.processes) as pool:
+            pool.map(canonical_keys, np.array_split(boards, args.processes * 4))
+        pool_time = time.perf_counter() - start
+
+        index = CanonicalIndex()
+        start = time.perf_counter()
+        added = sum(index.add_key(key) for key in keys)
+        index_time = time.perf_counter() - start
+        print(f"N={n:>7}  canonicalize {canonical_time:7.2f} s ({canonical_time / n * 1e6:5.0f} us/board)   "
+              f"{args.processes} processes {pool_time:7.2f} s   index {index_time * 1e3:6.1f} ms   "
+              f"{added} distinct of {originals} originals")
+
+def register_users(path, usernames):
+    registry = UserRegistry(path, legacy_path=f'{path}.json')
+    return sum(registry.add(username) for username in usernames)
+
+def bench_users(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        # Load test: every process registers its own users plus a set that all processes race for
+        path = os.path.join(tmp, 'users.log')
+        shared = [f'shared{i}' for i in range(args.users // 2)]
+        jobs = [(path, [f'p{p}-{i}' for i in range(args.users)] + shared) for p in range(args.processes)]
+        start = time.perf_counter()
+        with Pool(args.processes) as pool:
+            added = sum(pool.starmap(register_users, jobs))
+        elapsed = time.perf_counter() - start
+        with open(path, 'rb') as file:
+            lines = file.read().splitlines()
+        expected = args.processes * args.users + len(shared)
+        print(f"{args.processes} processes registered {added} users in {elapsed:.2f} s: "
+              f"{len(lines)} lines, {len(set(lines))} unique, expected {expected}")
+
+        for size in (1000, 10000, 100000, 300000):
+            path = os.path.join(tmp, f'users{size}.log')
+            with open(path, 'wb') as file:
+                file.writelines((json.dumps(f'user{i}') + '\n').encode() for i in range(size))
+            registry = UserRegistry(path, legacy_path=f'{path}.json')
+            cold = timed(lambda: 'user0' in registry, 1)
+            lookup = timed(lambda: f'user{size - 1}' in registry, args.repeat)
+            names = iter(f'new{i}' for i in range(args.repeat))
+            register = timed(lambda: registry.add(next(names)), args.repeat)
+            print(f"{size:>7} users   first lookup {cold[0] * 1000:7.2f} ms   "
+                  f"login {lookup[len(lookup) // 2] * 1e6:6.2f} us   register {register[len(register) // 2] * 1000:6.3f} ms")
+
+def bench_ui(args):
+    # Click-to-rendered-board time: the first game builds the game screen, later games reuse it
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    from ui import SudokuApp
+    from sudoku import display_sudoku
+    from game_view import GameView
+    from board_widget import EDITABLE
+
+    qt_app = QApplication.instance() or QApplication([])
+    window = SudokuApp()
+    window.username = 'bench'
+    window.show()
+    boards = [generate_sudoku_board(difficulty) for difficulty in ("easy", "medium", "hard") * (args.repeat // 3 + 1)]
+
+    def render(board):
+        display_sudoku(window, board, "easy")
+        qt_app.processEvents()
+        window.grab()
+
+    report("first game (builds widgets)", timed(lambda: render(boards[0]), 1))
+    boards_iter = iter(boards[1:])
+    report("new game (reused widgets)", timed(lambda: render(next(boards_iter)), args.repeat))
+
+    def rebuild():
+        view = GameView(window)
+        view.load(boards[0], boards[0])
+        window.layout.addWidget(view)
+        qt_app.processEvents()
+        window.grab()
+        window.layout.removeWidget(view)
+        view.deleteLater()
+    report("rebuilding the game screen", timed(rebuild, args.repeat))
+
+    # One move repaints a single cell rectangle of the board widget
+    render(boards[0])
+    board_widget = window.game_view.board
+    moves = iter(range(args.repeat * 10))
+    def move():
+        board_widget.set_cell(0, 0, next(moves) % 9 + 1, EDITABLE)
+        qt_app.processEvents()
+    report("cell update (dirty repaint)", timed(move, args.repeat * 10))
+
+    window.clear_layout()
+    window.close()
+
+def bench_hints(args):
+    # Hint latency over whole games: every call is preceded by the move the previous hint suggested
+    from hints import HintEngine
+    from sudoku import generate_puzzle
+
+    hint_times, move_times, solved = [], [], 0
+    for _ in range(args.repeat):
+        puzzle, solution = generate_puzzle("hard")
+        engine = HintEngine(puzzle)
+        while True:
+            start = time.perf_counter()
+            hint = engine.next_hint()
+            hint_times.append(time.perf_counter() - start)
+            if hint is None:
+                break
+            start = time.perf_counter()
+            engine.apply(hint)
+            move_times.append(time.perf_counter() - start)
+        solved += 0 not in engine.cells
+    hint_times.sort()
+    move_times.sort()
+    report("next hint", hint_times)
+    report("apply hint (incremental update)", move_times)
+    print(f"p99 hint {hint_times[len(hint_times) * 99 // 100] * 1e6:.0f} us, {solved}/{args.repeat} hard puzzles solved by hints alone")
+
+def bench_sizes(args):
+    # Larger boards go through the exact-cover solver; 9x9 is timed with both solvers for scale. Every
+    # exact-cover run gets the default SearchBudget, and how each run ended is tallied under its timing.
+    from collections import Counter
+    from random import Random
+    from exact_cover import solve_exact_cover, count_exact_cover
+    from sudoku import SearchAborted, SearchBudget, generate_puzzle
+
+    def budgeted(name, search, puzzles):
+        boards = iter(puzzles)
+        outcomes = Counter()
+        def run():
+            try:
+                outcomes[search(next(boards).copy(), SearchBudget())] += 1
+            except SearchAborted as e:
+                outcomes[e.args[0]] += 1
+        report(name, timed(run, len(puzzles)))
+        print(f"  {dict(outcomes)}")
+
+    def solve(board, budget):
+        return "solved" if solve_exact_cover(board, budget) else "no solution"
+
+    def uniqueness(board, budget):
+        return ("no solution", "unique", "several")[count_exact_cover(board, 2, budget)]
+
+    for size in args.board_sizes:
+        repeat = args.repeat if size == 9 else max(1, args.repeat // 10)
+        start = time.perf_counter()
+        puzzles = [generate_puzzle("hard", size=size)[0] for _ in range(repeat)]
+        print(f"{size}x{size}: generated {repeat} hard puzzles in {time.perf_counter() - start:.1f}s, "
+              f"mean {sum(p.empty_count() for p in puzzles) / repeat:.0f} blanks")
+        budgeted(f"{size}x{size} exact cover solve", solve, puzzles)
+        budgeted(f"{size}x{size} exact cover uniqueness", uniqueness, puzzles)
+        if size == 9:
+            boards = iter(puzzles)
+            report("9x9 bitmask solve", timed(lambda: solve_sudoku(next(boards).copy()), repeat))
+
+        # Generated puzzles are easy by construction, since a clue whose uniqueness check runs long is
+        # kept. Full grids blanked at random, with no such selection, show the solver's real spread.
+        rng = Random(size)
+        for fraction in (1 / 2, 2 / 3):
+            blanked = []
+            for seed in range(repeat):
+                _, grid = generate_puzzle("easy", unique=False, size=size, seed=seed)
+                for p in rng.sample(range(size * size), int(size * size * fraction)):
+                    grid.cells[p] = 0
+                blanked.append(grid)
+            budgeted(f"{size}x{size} {fraction:.0%} blanked solve", solve, blanked)
+            budgeted(f"{size}x{size} {fraction:.0%} blanked uniqueness", uniqueness, blanked)
+
+def bench_ids(args):
+    # Puzzle IDs against the JSON board dump they replace, and what a cache hit saves over a regeneration
+    from puzzle_ids import seed_id, clue_id, decode_puzzle_id, puzzle_from_id
+    from sudoku import generate_puzzle
+
+    for difficulty in ("easy", "medium", "hard"):
+        seeds = iter(range(args.repeat))
+        report(f"decode seed ID {difficulty} (regenerate)", timed(lambda: decode_puzzle_id(seed_id(next(seeds), difficulty)), args.repeat))
+    puzzle_from_id(seed_id(0, "hard"))
+    report("decode seed ID (cached)", timed(lambda: puzzle_from_id(seed_id(0, "hard")), args.repeat))
+
+    puzzles = [generate_puzzle(difficulty)[0] for difficulty in ("easy", "medium", "hard") for _ in range(args.repeat // 3)]
+    ids = [clue_id(puzzle, "hard") for puzzle in puzzles]
+    boards = iter(puzzles)
+    report("encode clue ID", timed(lambda: clue_id(next(boards), "hard"), len(puzzles)))
+    codes = iter(ids)
+    report("decode clue ID (solve)", timed(lambda: decode_puzzle_id(next(codes)), len(ids)))
+    dump = sum(len(json.dumps(puzzle.to_rows())) for puzzle in puzzles) / len(puzzles)
+    print(f"seed ID {len(seed_id(20261018, 'hard'))} chars, clue ID {sum(map(len, ids)) / len(ids):.0f} chars on average, "
+          f"JSON board {dump:.0f} chars")
+
+def bench_grade(args):
+    # Grading cost per puzzle, which generation pays inline on every candidate it cuts
+    from grader import grade_puzzle
+    from sudoku import _cut_puzzle
+
+    for difficulty in ("easy", "medium", "hard"):
+        boards = [_cut_puzzle(difficulty, True)[0] for _ in range(args.repeat)]
+        grades = [grade_puzzle(board) for board in boards]
+        boards = iter(boards)
+        report(f"grade {difficulty}", timed(lambda: grade_puzzle(next(boards)), args.repeat))
+        kept = sum(grade["difficulty"] == difficulty for grade in grades)
+        print(f"{kept}/{args.repeat} {difficulty} cuts kept, mean score {sum(grade['score'] for grade in grades) / len(grades):.0f}")
+
+def bench_charts(args):
+    # Cost of one statistics chart render, which the app does on a worker thread when the stats change
+    import random
+    from charts import render_statistics_chart
+    from stats import empty_stats, record_game
+
+    stats = empty_stats()
+    for _ in range(200):
+        record_game(stats, random.choice(("easy", "medium", "hard")), random.randint(60, 1800), random.choice(("Win", "Lose")))
+    report("first render (loads matplotlib)", timed(lambda: render_statistics_chart(stats), 1))
+    report("chart render", timed(lambda: render_statistics_chart(stats), max(1, args.repeat // 10)))
+
+# Child process for bench_startup: prints once the login screen has been painted
+FIRST_FRAME_SCRIPT = """
+from PyQt5.QtWidgets import QApplication
+from ui import SudokuApp
+app = QApplication([])
+window = SudokuApp()
+window.show()
+app.processEvents()
+window.grab()
+print('frame', flush=True)
+window.close()
+"""
+
+def bench_startup(args):
+    # Cold start of main.py's path: module import cost and launch-to-first-frame, each in a fresh interpreter
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=here, QT_QPA_PLATFORM=os.environ.get('QT_QPA_PLATFORM', 'offscreen'))
+    with tempfile.TemporaryDirectory() as tmp:
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import ui'],
+                                cwd=tmp, env=env, capture_output=True, text=True, check=True)
+        imports = []
+        for line in result.stderr.splitlines():
+            parts = line.split('|')
+            if line.startswith('import time:') and parts[1].strip().isdigit():
+                imports.append((int(parts[1]), parts[2].rstrip()))
+        for cumulative, name in sorted(imports, reverse=True)[:args.top]:
+            print(f"import {name:<40} {cumulative / 1000:8.2f} ms")
+
+        def first_frame():
+            child = subprocess.Popen([sys.executable, '-c', FIRST_FRAME_SCRIPT], cwd=tmp, env=env,
+                                     stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            child.stdout.readline()
+            elapsed = time.perf_counter() - start
+            child.wait()
+            return elapsed
+
+        times = []
+        for _ in range(max(1, args.repeat // 10)):
+            start = time.perf_counter()
+            times.append(first_frame())
+        times.sort()
+        report("launch to first frame", times)
+
+    median = times[len(times) // 2] * 1000
+    if median > args.budget:
+        raise SystemExit(f"cold start {median:.0f} ms exceeds the {args.budget} ms budget")
+    print(f"cold start {median:.0f} ms, budget {args.budget} ms")
+
+BENCHMARKS = {
+    "generate": bench_generate,
+    "batch": bench_batch,
+    "users": bench_users,
+    "ui": bench_ui,
+    "startup": bench_startup,
+    "charts": bench_charts,
+    "hints": bench_hints,
+    "grade": bench_grade,
+    "sizes": bench_sizes,
+    "canonical": bench_canonical,
+    "ids": bench_ids,
+}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sudoku benchmarks')
+    parser.add_argument('benchmark', nargs='?', choices=sorted(BENCHMARKS), default=None)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--sizes', type=lambda s: [int(n) for n in s.split(',')], default=[1000, 10000, 100000])
+    parser.add_argument('--scalar-limit', type=int, default=10000)
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--budget', type=int, default=1000)
+    parser.add_argument('--board-sizes', type=lambda s: [int(n) for n in s.split(',')], default=[9, 16, 25])
+    args = parser.parse_args()
+
+    for name, bench in BENCHMARKS.items():
+        if args.benchmark in (None, name):
+            bench(args)
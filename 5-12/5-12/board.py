@@ -0,0 +1,104 @@
+# board.py
+from functools import lru_cache
+from math import isqrt
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+@lru_cache(maxsize=None)
+def board_units(size):
+    # Units are the rows (0..size-1), columns (size..2*size-1) and boxes of a size x size board
+    # stored row-major. Returns (units of each cell, cells of each unit, peers of each cell).
+    base = isqrt(size)
+    if base * base != size:
+        raise ValueError(f"board side must be a square, got {size}")
+    cell_units = [(i // size, size + i % size, 2 * size + base * (i // (size * base)) + (i % size) // base)
+                  for i in range(size * size)]
+    units = [[] for _ in range(3 * size)]
+    for i, cell in enumerate(cell_units):
+        for u in cell:
+            units[u].append(i)
+    peers = [tuple(sorted({p for u in cell for p in units[u]} - {i})) for i, cell in enumerate(cell_units)]
+    return cell_units, units, peers
+
+CELL_UNITS, UNITS, PEERS = board_units(9)
+
+class Board:
+    __slots__ = ('cells', 'size')
+
+    def __init__(self, cells=None, size=9):
+        self.size = size
+        self.cells = bytearray(cells) if cells is not None else bytearray(size * size)
+        if len(self.cells) != size * size:
+            raise ValueError(f"a {size}x{size} board has {size * size} cells, got {len(self.cells)}")
+
+    @classmethod
+    def from_rows(cls, rows):
+        # Accepts ints, digit strings and blanks ("" or 0) as cell values
+        rows = list(rows)
+        return cls((int(num) if num else 0 for row in rows for num in row), len(rows))
+
+    def to_rows(self):
+        size = self.size
+        return [list(self.cells[row * size:row * size + size]) for row in range(size)]
+
+    def __getitem__(self, pos):
+        row, col = pos
+        return self.cells[row * self.size + col]
+
+    def __setitem__(self, pos, num):
+        row, col = pos
+        self.cells[row * self.size + col] = num
+
+    def __eq__(self, other):
+        return isinstance(other, Board) and self.size == other.size and self.cells == other.cells
+
+    def __repr__(self):
+        if self.size == 9:
+            return f"Board({bytes(self.cells)!r})"
+        return f"Board({bytes(self.cells)!r}, size={self.size})"
+
+    def pack(self):
+        # Two cells per byte (41 bytes for 9x9); sides of 16 and up need 5 bits a cell
+        if self.size < 16:
+            cells = self.cells + b'\0'
+            return bytes(cells[i] << 4 | cells[i + 1] for i in range(0, len(self.cells), 2))
+        bits = packed_bits(self.size)
+        value = 0
+        for num in self.cells:
+            value = value << bits | num
+        length = packed_size(self.size)
+        return (value << (length * 8 - len(self.cells) * bits)).to_bytes(length, 'big')
+
+    @classmethod
+    def unpack(cls, data, size=9):
+        count = size * size
+        if size < 16:
+            cells = bytearray(len(data) * 2)
+            cells[0::2] = bytes(byte >> 4 for byte in data)
+            cells[1::2] = bytes(byte & 0x0F for byte in data)
+            return cls(cells[:count], size)
+        bits = packed_bits(size)
+        value = int.from_bytes(data, 'big') >> (len(data) * 8 - count * bits)
+        mask = (1 << bits) - 1
+        return cls(reversed([value >> (k * bits) & mask for k in range(count)]), size)
+
+    def copy(self):
+        return Board(self.cells, self.size)
+
+    def snapshot(self):
+        return bytes(self.cells)
+
+    def restore(self, snapshot):
+        self.cells[:] = snapshot
+
+    def empty_count(self):
+        return self.cells.count(0)
+
+    def is_full(self):
+        return 0 not in self.cells
+
+def packed_bits(size):
+    return 4 if size < 16 else size.bit_length()
+
+def packed_size(size):
+    return (size * size * packed_bits(size) + 7) // 8
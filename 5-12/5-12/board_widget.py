@@ -0,0 +1,149 @@
+# board_widget.py
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QRect, pyqtSignal
+from PyQt5.QtGui import QPainter, QColor, QFont, QPen
+
+CELL_SIZE = 60
+MARGIN = 2
+
+# Cell states: editable cells are the only ones that accept input
+EDITABLE = 0
+GIVEN = 1
+FILLED = 2
+
+BACKGROUNDS = {EDITABLE: QColor('#ffffff'), GIVEN: QColor('#e0e0e0'), FILLED: QColor('#e8f5e9')}
+TEXT_COLORS = {EDITABLE: QColor('#000000'), GIVEN: QColor('#000000'), FILLED: QColor('#2e7d32')}
+SELECTED_BACKGROUND = QColor('#bbdefb')
+CANDIDATE_COLOR = QColor('#757575')
+THIN_PEN = QPen(QColor('#4CAF50'), 1)
+THICK_PEN = QPen(QColor('#0000FF'), 3)
+
+class SudokuBoardWidget(QWidget):
+    # Paints the whole grid itself; changes repaint only the rectangles of the cells involved
+    cell_selected = pyqtSignal(int, int)
+    cell_entered = pyqtSignal(int, int, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFocusPolicy(Qt.StrongFocus)
+        self.setFixedSize(9 * CELL_SIZE + 2 * MARGIN, 9 * CELL_SIZE + 2 * MARGIN)
+        self.values = bytearray(81)
+        self.states = bytearray(81)
+        self.selected = None
+        self.candidates = [0] * 81
+        self.show_candidates = False
+        self.cell_font = QFont()
+        self.cell_font.setPixelSize(24)
+        self.cell_font.setBold(True)
+        self.candidate_font = QFont()
+        self.candidate_font.setPixelSize(CELL_SIZE // 4)
+
+    def load(self, puzzle, board):
+        # Clues come from the puzzle; cells the player has already filled are taken from the board
+        for i in range(81):
+            num = board.cells[i]
+            self.values[i] = num
+            self.states[i] = GIVEN if puzzle.cells[i] else FILLED if num else EDITABLE
+        self.selected = None
+        self.update()
+
+    def set_cell(self, row, col, num, state):
+        i = row * 9 + col
+        if self.values[i] != num or self.states[i] != state:
+            self.values[i] = num
+            self.states[i] = state
+            self.update(self.cell_rect(row, col))
+
+    def set_candidates(self, candidates):
+        # Pencil marks as digit bitmasks (digit d is bit 1 << d); only cells whose marks changed are repainted
+        for i, mask in enumerate(candidates):
+            if self.candidates[i] != mask:
+                self.candidates[i] = mask
+                if self.show_candidates and not self.values[i]:
+                    self.update(self.cell_rect(i // 9, i % 9))
+
+    def set_show_candidates(self, show):
+        self.show_candidates = show
+        self.update()
+
+    def is_editable(self, row, col):
+        return self.states[row * 9 + col] == EDITABLE
+
+    def select(self, row, col):
+        if self.selected:
+            self.update(self.cell_rect(*self.selected))
+        self.selected = (row, col)
+        self.update(self.cell_rect(row, col))
+        self.cell_selected.emit(row, col)
+
+    def cell_rect(self, row, col):
+        return QRect(MARGIN + col * CELL_SIZE, MARGIN + row * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+    def cell_at(self, pos):
+        row, col = (pos.y() - MARGIN) // CELL_SIZE, (pos.x() - MARGIN) // CELL_SIZE
+        if 0 <= row < 9 and 0 <= col < 9:
+            return row, col
+        return None
+
+    def mousePressEvent(self, event):
+        cell = self.cell_at(event.pos())
+        if cell:
+            self.select(*cell)
+
+    def keyPressEvent(self, event):
+        moves = {Qt.Key_Up: (-1, 0), Qt.Key_Down: (1, 0), Qt.Key_Left: (0, -1), Qt.Key_Right: (0, 1)}
+        if event.key() in moves:
+            row, col = self.selected or (0, 0)
+            d_row, d_col = moves[event.key()]
+            self.select((row + d_row) % 9, (col + d_col) % 9)
+            return
+
+        text = event.text()
+        if self.selected and text and text.isprintable():
+            # Anything but 1-9 is reported as 0 so the game can count it as an invalid entry
+            self.enter_number(int(text) if text in '123456789' else 0)
+            return
+        super().keyPressEvent(event)
+
+    def enter_number(self, num):
+        if self.selected and self.is_editable(*self.selected):
+            self.cell_entered.emit(*self.selected, num)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setFont(self.cell_font)
+        dirty = event.rect()
+
+        first_row, last_row = max(0, (dirty.top() - MARGIN) // CELL_SIZE), min(8, (dirty.bottom() - MARGIN) // CELL_SIZE)
+        first_col, last_col = max(0, (dirty.left() - MARGIN) // CELL_SIZE), min(8, (dirty.right() - MARGIN) // CELL_SIZE)
+        for row in range(first_row, last_row + 1):
+            for col in range(first_col, last_col + 1):
+                i = row * 9 + col
+                rect = self.cell_rect(row, col)
+                state = self.states[i]
+                painter.fillRect(rect, SELECTED_BACKGROUND if self.selected == (row, col) else BACKGROUNDS[state])
+                if self.values[i]:
+                    painter.setPen(TEXT_COLORS[state])
+                    painter.drawText(rect, Qt.AlignCenter, str(self.values[i]))
+                elif self.show_candidates and self.candidates[i]:
+                    self.paint_candidates(painter, rect, self.candidates[i])
+                    painter.setFont(self.cell_font)
+
+        # Grid lines; anything outside the dirty rectangle is clipped away by Qt
+        size = 9 * CELL_SIZE
+        for pen, step in ((THIN_PEN, 1), (THICK_PEN, 3)):
+            painter.setPen(pen)
+            for k in range(0, 10, step):
+                offset = MARGIN + k * CELL_SIZE
+                painter.drawLine(offset, MARGIN, offset, MARGIN + size)
+                painter.drawLine(MARGIN, offset, MARGIN + size, offset)
+
+    def paint_candidates(self, painter, rect, mask):
+        # Small digits laid out 3x3 inside the cell, digit d in slot d - 1
+        painter.setFont(self.candidate_font)
+        painter.setPen(CANDIDATE_COLOR)
+        slot = CELL_SIZE // 3
+        for digit in range(1, 10):
+            if mask >> digit & 1:
+                row, col = divmod(digit - 1, 3)
+                painter.drawText(QRect(rect.left() + col * slot, rect.top() + row * slot, slot, slot), Qt.AlignCenter, str(digit))
@@ -0,0 +1,52 @@
+# build_corpus.py
+import argparse
+import os
+import time
+from multiprocessing import Pool
+from sudoku import DIFFICULTIES, generate_puzzle
+from corpus import pack_record, write_header
+from canonical import CanonicalIndex, canonical_key
+
+def make_record(difficulty):
+    board, solution = generate_puzzle(difficulty)
+    try:
+        key = canonical_key(board)
+    except ValueError:
+        # Too symmetric to canonicalize, so it cannot be checked for duplicates: leave it out
+        return None, None
+    return key, pack_record(board, solution, difficulty)
+
+def build_corpus(path, counts, processes=None):
+    # Records stream straight to a temporary file, then replace the corpus in one rename. A puzzle
+    # equivalent to one already written under some symmetry is dropped and another one generated.
+    tmp_path = f'{path}.tmp'
+    index = CanonicalIndex()
+    duplicates = 0
+    with Pool(processes) as pool, open(tmp_path, 'wb') as file:
+        write_header(file, counts)
+        for difficulty in DIFFICULTIES:
+            missing = counts.get(difficulty, 0)
+            while missing:
+                for key, record in pool.imap_unordered(make_record, [difficulty] * missing, chunksize=64):
+                    if key is not None and index.add_key(key):
+                        file.write(record)
+                        missing -= 1
+                    else:
+                        duplicates += 1
+    os.replace(tmp_path, path)
+    return duplicates
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build a packed puzzle corpus')
+    parser.add_argument('output', nargs='?', default='puzzles.corpus')
+    parser.add_argument('--easy', type=int, default=1000)
+    parser.add_argument('--medium', type=int, default=1000)
+    parser.add_argument('--hard', type=int, default=1000)
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    counts = {'easy': args.easy, 'medium': args.medium, 'hard': args.hard}
+    start = time.perf_counter()
+    duplicates = build_corpus(args.output, counts, args.processes)
+    print(f'Wrote {sum(counts.values())} puzzles to {args.output} in {time.perf_counter() - start:.1f}s, '
+          f'{duplicates} equivalent duplicates dropped')
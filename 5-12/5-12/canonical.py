@@ -0,0 +1,131 @@
+# canonical.py
+from itertools import permutations, product
+from math import isqrt
+from board import Board
+
+# The canonical form of a board is the smallest one, read row by row, that digit relabeling, band and
+# row swaps, stack and column swaps and transposition (which with the swaps gives the rotations and
+# reflections) can reach. Clues sort before blanks while comparing, so the canonical form front-loads
+# clues; that keeps the number of tied arrangements small on puzzles, which are mostly blanks.
+_BLANK = 255
+# Tied arrangements the search may carry at once. Real puzzles stay in the low thousands; near-empty
+# or highly symmetric boards tie almost everywhere and would take minutes, so they are refused.
+STATE_LIMIT = 50000
+
+def _front_loaded(line, stack, base):
+    # Column orders within one stack that put its clues first; clues and blanks each go in any order
+    cols = range(stack * base, stack * base + base)
+    clues = [c for c in cols if line[c]]
+    blanks = [c for c in cols if not line[c]]
+    return [a + b for a in permutations(clues) for b in permutations(blanks)]
+
+def _emit(line, cols, labels, bound=None):
+    # One output row; digits seen for the first time take the next label. labels[0] is that next label.
+    # Gives up with None as soon as the row is sure to come out larger than `bound`.
+    row = []
+    tied = bound is not None
+    for c in cols:
+        num = line[c]
+        if not num:
+            value = _BLANK
+        else:
+            if not labels[num]:
+                labels[num] = labels[0]
+                labels[0] += 1
+            value = labels[num]
+        if tied:
+            if value > bound[len(row)]:
+                return None
+            tied = value == bound[len(row)]
+        row.append(value)
+    return row
+
+def canonical_form(board):
+    size = board.size
+    base = isqrt(size)
+    rows = [tuple(board.cells[r * size:r * size + size]) for r in range(size)]
+
+    # Row 0 holds only new digits, which always label 1, 2, 3... in order, so only where its clues
+    # sit matters: the line with the most clues front-loaded into the leading stacks wins
+    best, lines = None, []
+    for grid in (rows, list(zip(*rows))):
+        for r, line in enumerate(grid):
+            counts = [sum(1 for c in range(s * base, s * base + base) if line[c]) for s in range(base)]
+            key = sorted(counts, reverse=True)
+            if best is None or key > best:
+                best, lines = key, []
+            if key == best:
+                lines.append((grid, r, counts))
+
+    # Each search state: (grid, source rows used so far, column order, digit labels)
+    states = []
+    for grid, r, counts in lines:
+        for stacks in permutations(range(base)):
+            if [counts[s] for s in stacks] != best:
+                continue
+            for orders in product(*(_front_loaded(grid[r], s, base) for s in stacks)):
+                cols = sum(orders, ())
+                labels = [1] + [0] * size
+                _emit(grid[r], cols, labels)
+                states.append((grid, [r], cols, labels))
+                if len(states) > STATE_LIMIT:
+                    raise ValueError('board too symmetric to canonicalize')
+    form = [_emit(states[0][0][states[0][1][0]], states[0][2], [1] + [0] * size)]
+
+    # Every later row is a choice of source row only: the rest of the current band, or the first row
+    # of a band not used yet. Keep the states whose next row is smallest.
+    for i in range(1, size):
+        best, next_states = None, []
+        for grid, used, cols, labels in states:
+            if i % base:
+                band = used[-1] // base * base
+                options = [r for r in range(band, band + base) if r not in used]
+            else:
+                bands = {r // base for r in used}
+                options = [r for r in range(size) if r // base not in bands]
+            for r in options:
+                next_labels = labels[:]
+                row = _emit(grid[r], cols, next_labels, best)
+                if row is None:
+                    continue
+                if best is None or row < best:
+                    best, next_states = row, []
+                if row == best:
+                    next_states.append((grid, used + [r], cols, next_labels))
+                    if len(next_states) > STATE_LIMIT:
+                        raise ValueError('board too symmetric to canonicalize')
+        form.append(best)
+        states = next_states
+
+    return Board((0 if num == _BLANK else num for row in form for num in row), size)
+
+def canonical_key(board):
+    # Packed canonical form: equal keys exactly when two boards are the same puzzle up to symmetry
+    return canonical_form(board).pack()
+
+class CanonicalIndex:
+    # Hash index over canonical forms, so a board equivalent to one already seen is found in O(1)
+    def __init__(self, boards=()):
+        self._keys = set()
+        for board in boards:
+            self.add(board)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def clear(self):
+        self._keys.clear()
+
+    def __contains__(self, board):
+        return canonical_key(board) in self._keys
+
+    def add(self, board):
+        # Returns False when an equivalent board was already indexed
+        return self.add_key(canonical_key(board))
+
+    def add_key(self, key):
+        # For keys worked out elsewhere, e.g. in the worker processes of a corpus build
+        if key in self._keys:
+            return False
+        self._keys.add(key)
+        return True
@@ -0,0 +1,59 @@
+# charts.py
+from PyQt5.QtGui import QImage
+from stats import average_time
+
+CHART_SIZE = (14, 8)
+CHART_DPI = 100
+
+def render_statistics_chart(stats):
+    # Runs on a worker thread: draws with the Agg backend into a QImage, which unlike QPixmap is thread-safe.
+    # matplotlib is only needed here, so it is imported on first use
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    wins = stats["wins"]
+    losses = stats["losses"]
+    by_difficulty = {k: stats["difficulties"][k] for k in ('easy', 'medium', 'hard')}
+    best_times = {k: v["best_time"] or 0 for k, v in by_difficulty.items()}
+    worst_times = {k: v["worst_time"] or 0 for k, v in by_difficulty.items()}
+    average_times = {k: average_time(v) for k, v in by_difficulty.items()}
+
+    labels = 'Wins', 'Losses'
+    sizes = [wins, losses]
+    colors = ['#4CAF50', '#FF6347']
+    explode = (0.1, 0)
+
+    fig = Figure(figsize=CHART_SIZE, dpi=CHART_DPI)
+    canvas = FigureCanvasAgg(fig)
+    ax1 = fig.add_subplot(121)
+    ax1.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%', shadow=True, startangle=140)
+    ax1.axis('equal')
+    ax1.set_title('Win/Loss Ratio')
+
+    ax2 = fig.add_subplot(122)
+    difficulties = ['Easy', 'Medium', 'Hard']
+    best = [best_times['easy'], best_times['medium'], best_times['hard']]
+    worst = [worst_times['easy'], worst_times['medium'], worst_times['hard']]
+    avg = [average_times['easy'], average_times['medium'], average_times['hard']]
+    bar_width = 0.2
+    index = range(len(difficulties))
+
+    bars_best = ax2.bar(index, best, bar_width, label='Best Time')
+    bars_worst = ax2.bar([i + bar_width for i in index], worst, bar_width, label='Worst Time')
+    bars_avg = ax2.bar([i + 2 * bar_width for i in index], avg, bar_width, label='Average Time')
+
+    ax2.set_xlabel('Difficulty')
+    ax2.set_ylabel('Time (s)')
+    ax2.set_title('Best, Worst, and Average Times by Difficulty')
+    ax2.set_xticks([i + bar_width for i in index])
+    ax2.set_xticklabels(difficulties)
+    ax2.legend()
+
+    for bar in (*bars_best, *bars_worst, *bars_avg):
+        yval = bar.get_height()
+        ax2.text(bar.get_x() + bar.get_width()/2, yval, round(yval, 2), ha='center', va='bottom')
+
+    canvas.draw()
+    width, height = canvas.get_width_height()
+    # copy() detaches the image from matplotlib's buffer
+    return QImage(canvas.buffer_rgba(), width, height, QImage.Format_RGBA8888).copy()
@@ -0,0 +1,74 @@
+# corpus.py
+import mmap
+import random
+import struct
+from board import Board, DIFFICULTIES
+
+# Header: magic, version, record size, then the record count of each difficulty.
+# Records are grouped by difficulty in DIFFICULTIES order so puzzle #k of a difficulty is one offset away.
+MAGIC = b'SDKC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIII')
+PACKED_CELLS = 41
+RECORD_SIZE = 2 * PACKED_CELLS + 1
+
+def pack_record(board, solution, difficulty):
+    return board.pack() + solution.pack() + bytes([DIFFICULTIES.index(difficulty)])
+
+def unpack_record(data):
+    board = Board.unpack(data[:PACKED_CELLS])
+    solution = Board.unpack(data[PACKED_CELLS:2 * PACKED_CELLS])
+    return board, solution, DIFFICULTIES[data[2 * PACKED_CELLS]]
+
+def write_header(file, counts):
+    file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, *(counts.get(d, 0) for d in DIFFICULTIES)))
+
+class PuzzleCorpus:
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, record_size, *counts = HEADER.unpack_from(self._map, 0)
+        except (ValueError, struct.error):
+            self._file.close()
+            raise ValueError(f'{path} is not a puzzle corpus')
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.close()
+            raise ValueError(f'{path} is not a version {VERSION} puzzle corpus')
+
+        self.counts = dict(zip(DIFFICULTIES, counts))
+        self._starts = {}
+        start = 0
+        for difficulty in DIFFICULTIES:
+            self._starts[difficulty] = start
+            start += self.counts[difficulty]
+        if HEADER.size + start * RECORD_SIZE > len(self._map):
+            self.close()
+            raise ValueError(f'{path} is truncated')
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def get(self, k):
+        if not 0 <= k < len(self):
+            raise IndexError(f'puzzle {k} out of range')
+        offset = HEADER.size + k * RECORD_SIZE
+        return unpack_record(self._map[offset:offset + RECORD_SIZE])
+
+    def get_by_difficulty(self, difficulty, k):
+        if not 0 <= k < self.counts[difficulty]:
+            raise IndexError(f'{difficulty} puzzle {k} out of range')
+        return self.get(self._starts[difficulty] + k)
+
+    def random(self, difficulty):
+        return self.get_by_difficulty(difficulty, random.randrange(self.counts[difficulty]))
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+def open_corpus(path):
+    try:
+        return PuzzleCorpus(path)
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,208 @@
+# exact_cover.py
+import random
+from functools import lru_cache
+from board import board_units
+
+# Algorithm X over the Sudoku exact-cover matrix. Each choice (cell, digit) covers four constraints:
+# the cell is filled, and the digit appears once in the cell's row, column and box. Columns are
+# kept as sets of the choices that still cover them, so covering and uncovering a column is the
+# same unlink/relink walk Dancing Links does, with set operations instead of pointer surgery.
+
+# Columns this small are checked for eliminations after every choice; larger ones rarely allow any
+ELIMINATION_LIMIT = 5
+# Search nodes the first attempt of solve_exact_cover may take before it restarts, and how fast that grows
+RESTART_NODES = 1000
+RESTART_GROWTH = 1.2
+
+@lru_cache(maxsize=None)
+def _choices(size):
+    # Choice i * size + (digit - 1) -> the four constraint columns it covers: the cell block, then
+    # digit-in-row, digit-in-column and digit-in-box blocks of size * size columns each. Unit ids from
+    # board_units already run rows, columns, boxes, so those three blocks follow on from the cells.
+    cell_units, _, _ = board_units(size)
+    cells = size * size
+    return [(i, cells + row * size + d, cells + col * size + d, cells + box * size + d)
+            for i, (row, col, box) in enumerate(cell_units) for d in range(size)]
+
+def _select(X, Y, r, dirty):
+    removed = []
+    for j in Y[r]:
+        for i in X[j]:
+            for k in Y[i]:
+                if k != j:
+                    X[k].discard(i)
+                    dirty.add(k)
+        removed.append(X.pop(j))
+    return removed
+
+def _deselect(X, Y, r, removed):
+    for j in reversed(Y[r]):
+        X[j] = removed.pop()
+        for i in X[j]:
+            for k in Y[i]:
+                if k != j:
+                    X[k].add(i)
+
+def _eliminate(X, Y, dirty):
+    # When every choice left for column j also covers column k, taking any other choice for k would
+    # leave j uncoverable, so those are struck out. With one choice left that is the forced move's
+    # fallout; with a few it is Sudoku's locked candidates. Only columns that lost choices can newly
+    # qualify, so the work follows `dirty`. Returns the choices struck out, for _restore, and False
+    # when a column is left with no choice at all.
+    struck = []
+    while dirty:
+        rows = X.get(dirty.pop())
+        if rows is None or len(rows) > ELIMINATION_LIMIT:
+            continue
+        if not rows:
+            dirty.clear()
+            return struck, False
+        common = None
+        for r in rows:
+            common = set(Y[r]) if common is None else common.intersection(Y[r])
+        for k in common:
+            extra = X[k] - rows
+            for r in extra:
+                for c in Y[r]:
+                    X[c].discard(r)
+                    dirty.add(c)
+            struck.extend(extra)
+    return struck, True
+
+def _restore(X, Y, struck):
+    for r in reversed(struck):
+        for c in Y[r]:
+            X[c].add(r)
+
+def _load(board):
+    # The matrix left once every given is selected, or None when two givens clash. Only choices
+    # that clash with no given are ever linked in, which is far cheaper than covering them away.
+    size = board.size
+    Y = _choices(size)
+    covered = set()
+    for i, num in enumerate(board.cells):
+        if num:
+            if not covered.isdisjoint(Y[i * size + num - 1]):
+                return None
+            covered.update(Y[i * size + num - 1])
+    # A constraint nothing can satisfy any more stays in as an empty column, so the search fails on it
+    X = {j: set() for j in range(4 * size * size) if j not in covered}
+    for i, num in enumerate(board.cells):
+        if not num:
+            for r in range(i * size, i * size + size):
+                if covered.isdisjoint(Y[r]):
+                    for j in Y[r]:
+                        X[j].add(r)
+    return X, Y
+
+def _branches(X, Y, rng):
+    # Choices for a column with fewest of them; a column with a single choice is a forced move, so
+    # the scan stops there. `rng` picks among equally small columns and orders equally good choices,
+    # so that each restart goes another way. The choice that takes fewest others with it is tried
+    # first (popped last).
+    best, fewest = [], None
+    for k, rows in X.items():
+        if fewest is None or len(rows) < fewest:
+            best, fewest = [k], len(rows)
+            if fewest <= 1:
+                break
+        elif len(rows) == fewest:
+            best.append(k)
+    j = rng.choice(best) if rng else best[0]
+    return sorted(X[j], key=lambda r: (-sum(len(X[c]) for c in Y[r]), rng.random() if rng else r))
+
+def _search(X, Y, budget, rng=None):
+    # Yields each solution as the list of choices made; the caller stops it once it has enough.
+    # The depth is one level per blank cell, so the levels live on explicit stacks, not Python's.
+    if budget is not None:
+        budget.charge()
+    dirty = set(X)
+    if not _eliminate(X, Y, dirty)[1]:
+        return
+    if not X:
+        yield []
+        return
+    branches = [_branches(X, Y, rng)]
+    path = []
+    while branches:
+        if not branches[-1]:
+            # Every choice at this level is used up: undo the choice that led here
+            branches.pop()
+            if path:
+                r, removed, struck = path.pop()
+                _restore(X, Y, struck)
+                _deselect(X, Y, r, removed)
+            continue
+        r = branches[-1].pop()
+        removed = _select(X, Y, r, dirty)
+        struck, ok = _eliminate(X, Y, dirty)
+        path.append((r, removed, struck))
+        if budget is not None:
+            budget.charge()
+        if not ok:
+            # A constraint can no longer be met: nothing to try below this choice
+            branches.append([])
+            continue
+        if X:
+            branches.append(_branches(X, Y, rng))
+            continue
+        yield [r for r, _, _ in path]
+        r, removed, struck = path.pop()
+        _restore(X, Y, struck)
+        _deselect(X, Y, r, removed)
+
+class _Cutoff(Exception):
+    pass
+
+class _Attempt:
+    # Node counter for one restart: charges the caller's budget too, and gives up at `limit`
+    def __init__(self, budget, limit):
+        self.budget = budget
+        self.limit = limit
+        self.nodes = 0
+
+    def charge(self):
+        self.nodes += 1
+        if self.nodes > self.limit:
+            raise _Cutoff
+        if self.budget is not None:
+            self.budget.charge()
+
+def solve_exact_cover(board, budget=None):
+    # Fills the board in place; returns False when it has no solution. A search that goes wrong
+    # early can spend a long time in a dead subtree, so attempts are cut off and restarted in
+    # another order with a growing node allowance; the fixed seed keeps results reproducible.
+    size = board.size
+    rng = random.Random(0)
+    limit = RESTART_NODES
+    while True:
+        state = _load(board)
+        if state is None:
+            return False
+        try:
+            for choices in _search(*state, _Attempt(budget, limit), rng):
+                for r in choices:
+                    board.cells[r // size] = r % size + 1
+                return True
+            return False
+        except _Cutoff:
+            limit = int(limit * RESTART_GROWTH)
+
+def count_exact_cover(board, limit=2, budget=None, exclude=None):
+    # `exclude` is a choice (cell * size + digit - 1) struck out before searching: whether a board
+    # has a solution other than one already known is a search for any solution without one of its
+    # choices, which is much cheaper than finding it again and then a second one
+    state = _load(board)
+    if state is None:
+        return 0
+    X, Y = state
+    if exclude is not None:
+        for j in Y[exclude]:
+            if j in X:
+                X[j].discard(exclude)
+    total = 0
+    for _ in _search(*state, budget):
+        total += 1
+        if total == limit:
+            break
+    return total
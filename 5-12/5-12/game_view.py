@@ -0,0 +1,99 @@
+# game_view.py
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QPushButton, QLabel, QShortcut
+from PyQt5.QtGui import QKeySequence
+from PyQt5.QtCore import Qt, pyqtSignal
+from board_widget import SudokuBoardWidget
+
+# One stylesheet for the controls; the board paints itself
+GAME_VIEW_STYLE = """
+    QPushButton {
+        color: white;
+        border: none;
+        padding: 15px;
+        font-size: 18px;
+        margin: 4px 2px;
+        border-radius: 8px;
+    }
+    QPushButton#numberButton { background-color: #4CAF50; }
+    QPushButton#numberButton:hover { background-color: #45a049; }
+    QPushButton#solveButton { background-color: #2196F3; }
+    QPushButton#solveButton:hover { background-color: #1976D2; }
+    QPushButton#saveButton { background-color: #FF9800; }
+    QPushButton#saveButton:hover { background-color: #FB8C00; }
+    QPushButton#backButton { background-color: #f44336; }
+    QPushButton#backButton:hover { background-color: #d32f2f; }
+    QPushButton#undoButton, QPushButton#redoButton { background-color: #607D8B; }
+    QPushButton#undoButton:hover, QPushButton#redoButton:hover { background-color: #546E7A; }
+    QPushButton#hintButton, QPushButton#pencilButton { background-color: #9C27B0; }
+    QPushButton#hintButton:hover, QPushButton#pencilButton:hover { background-color: #8E24AA; }
+    QPushButton#pencilButton:checked { background-color: #6A1B9A; }
+"""
+
+class GameView(QWidget):
+    # Built once and reused for every game; load() only resets values and cell states
+    cell_edited = pyqtSignal(int, int, int)
+    cell_selected = pyqtSignal(int, int)
+    number_clicked = pyqtSignal(int)
+    solve_clicked = pyqtSignal()
+    save_clicked = pyqtSignal()
+    back_clicked = pyqtSignal()
+    undo_clicked = pyqtSignal()
+    redo_clicked = pyqtSignal()
+    hint_clicked = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setStyleSheet(GAME_VIEW_STYLE)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.board = SudokuBoardWidget(self)
+        self.board.cell_selected.connect(self.cell_selected)
+        self.board.cell_entered.connect(self.cell_edited)
+        layout.addWidget(self.board, alignment=Qt.AlignCenter)
+
+        number_grid = QGridLayout()
+        number_grid.setSpacing(10)
+        self.number_buttons = []
+        for i in range(1, 10):
+            button = QPushButton(f"{i}", self)
+            button.setObjectName('numberButton')
+            button.clicked.connect(lambda _, num=i: self.number_clicked.emit(num))
+            number_grid.addWidget(button, (i-1)//3, (i-1)%3)
+            self.number_buttons.append(button)
+        layout.addLayout(number_grid)
+
+        history_row = QHBoxLayout()
+        for text, name, signal, keys in (('Undo', 'undoButton', self.undo_clicked, QKeySequence.Undo),
+                                         ('Redo', 'redoButton', self.redo_clicked, QKeySequence.Redo)):
+            button = QPushButton(text, self)
+            button.setObjectName(name)
+            button.clicked.connect(signal)
+            QShortcut(keys, self, signal.emit)
+            history_row.addWidget(button)
+        hint_button = QPushButton('Hint', self)
+        hint_button.setObjectName('hintButton')
+        hint_button.clicked.connect(self.hint_clicked)
+        history_row.addWidget(hint_button)
+        pencil_button = QPushButton('Pencil Marks', self)
+        pencil_button.setObjectName('pencilButton')
+        pencil_button.setCheckable(True)
+        pencil_button.toggled.connect(self.board.set_show_candidates)
+        history_row.addWidget(pencil_button)
+        layout.addLayout(history_row)
+
+        for text, name, signal in (('Solve Sudoku', 'solveButton', self.solve_clicked),
+                                   ('Save Game', 'saveButton', self.save_clicked),
+                                   ('Back', 'backButton', self.back_clicked)):
+            button = QPushButton(text, self)
+            button.setObjectName(name)
+            button.clicked.connect(signal)
+            layout.addWidget(button)
+
+        self.timer_label = QLabel(self)
+        layout.addWidget(self.timer_label)
+        self.error_label = QLabel(self)
+        layout.addWidget(self.error_label)
+
+    def load(self, puzzle, board):
+        self.board.load(puzzle, board)
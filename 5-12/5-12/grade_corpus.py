@@ -0,0 +1,46 @@
+# grade_corpus.py
+import argparse
+import time
+from collections import Counter
+from multiprocessing import Pool
+from board import DIFFICULTIES
+from corpus import PuzzleCorpus
+from grader import grade_puzzle
+
+def _grade_range(args):
+    path, start, stop = args
+    corpus = PuzzleCorpus(path)
+    try:
+        results = Counter()
+        for k in range(start, stop):
+            board, _, labelled = corpus.get(k)
+            results[labelled, grade_puzzle(board)["difficulty"]] += 1
+        return results
+    finally:
+        corpus.close()
+
+def grade_corpus(path, processes=None, chunk=2000):
+    # Counts (labelled difficulty, graded difficulty) pairs over every puzzle in a corpus file
+    corpus = PuzzleCorpus(path)
+    total = len(corpus)
+    corpus.close()
+    results = Counter()
+    with Pool(processes) as pool:
+        for counts in pool.imap_unordered(_grade_range, [(path, k, min(k + chunk, total)) for k in range(0, total, chunk)]):
+            results.update(counts)
+    return results
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Grade every puzzle in a corpus by the techniques it needs')
+    parser.add_argument('corpus', nargs='?', default='puzzles.corpus')
+    parser.add_argument('--processes', type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = grade_corpus(args.corpus, args.processes)
+    elapsed = time.perf_counter() - start
+    total = sum(results.values())
+    print(f"graded {total} puzzles in {elapsed:.1f} s ({total / elapsed:.0f}/s)")
+    for labelled in DIFFICULTIES:
+        row = '  '.join(f"{graded} {results[labelled, graded]:>7}" for graded in DIFFICULTIES)
+        print(f"labelled {labelled:<7} graded {row}")
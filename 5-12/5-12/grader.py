@@ -0,0 +1,39 @@
+# grader.py
+from collections import Counter
+from board import DIFFICULTIES
+from hints import HintEngine, TECHNIQUES, NAKED_SINGLE, HIDDEN_SINGLE
+
+# Past the end of the technique ladder: the rest of the puzzle needs trial and error
+GUESSING = "guessing"
+LADDER = TECHNIQUES + (GUESSING,)
+
+# The hardest technique a puzzle may need and still count as each difficulty
+DIFFICULTY_CEILINGS = {"easy": NAKED_SINGLE, "medium": HIDDEN_SINGLE, "hard": GUESSING}
+
+def grade_puzzle(board):
+    # Solves with the hint engine's techniques, simplest first, and scores the hardest one needed
+    # and how often it was used. Cells left when the ladder runs out count as uses of guessing.
+    engine = HintEngine(board)
+    steps = Counter()
+    while True:
+        hint = engine.next_hint()
+        if hint is None:
+            break
+        steps[hint["technique"]] += 1
+        engine.apply(hint)
+    left = engine.cells.count(0)
+    if left:
+        steps[GUESSING] = left
+
+    hardest = max(steps, key=LADDER.index) if steps else NAKED_SINGLE
+    return {
+        "difficulty": difficulty_for(hardest),
+        "technique": hardest,
+        "uses": steps[hardest],
+        "score": LADDER.index(hardest) * 100 + min(steps[hardest], 99),
+        "steps": dict(steps),
+    }
+
+def difficulty_for(technique):
+    level = LADDER.index(technique)
+    return next(d for d in DIFFICULTIES if level <= LADDER.index(DIFFICULTY_CEILINGS[d]))
@@ -0,0 +1,169 @@
+# hints.py
+from board import CELL_UNITS, UNITS, PEERS
+
+DIGITS = 0x3FE
+BIT_COUNT = [bin(m).count("1") for m in range(1 << 10)]
+
+# Techniques in the order they are tried, simplest first
+NAKED_SINGLE = "naked single"
+HIDDEN_SINGLE = "hidden single"
+POINTING = "locked candidates (pointing)"
+CLAIMING = "locked candidates (claiming)"
+NAKED_PAIR = "naked pair"
+TECHNIQUES = (NAKED_SINGLE, HIDDEN_SINGLE, POINTING, CLAIMING, NAKED_PAIR)
+
+def _intersection(box, line):
+    shared = [i for i in UNITS[box] if i in UNITS[line]]
+    return box, line, shared, [i for i in UNITS[line] if i not in shared], [i for i in UNITS[box] if i not in shared]
+
+# Every box/line intersection as (box, line, shared cells, rest of the line, rest of the box)
+INTERSECTIONS = [_intersection(box, line) for box in range(18, 27)
+                 for line in sorted({u for i in UNITS[box] for u in CELL_UNITS[i][:2]})]
+
+def cell_name(i):
+    return f"R{i // 9 + 1}C{i % 9 + 1}"
+
+def unit_name(u):
+    return ("row", "column", "box")[u // 9] + f" {u % 9 + 1}"
+
+def digits_of(mask):
+    return [d for d in range(1, 10) if mask >> d & 1]
+
+class HintEngine:
+    # Candidate bitmasks (digit d is bit 1 << d) kept up to date one move at a time. Eliminations
+    # found by locked candidates or pairs are kept apart so an erase can simply drop them.
+    def __init__(self, board):
+        self.cells = bytearray(board.cells)
+        self.used = [0] * 27
+        self.eliminated = [0] * 81
+        for i, num in enumerate(self.cells):
+            if num:
+                for u in CELL_UNITS[i]:
+                    self.used[u] |= 1 << num
+        self.candidates = [0 if num else self._allowed(i) for i, num in enumerate(self.cells)]
+
+    def _allowed(self, i):
+        r, c, b = CELL_UNITS[i]
+        return DIGITS & ~(self.used[r] | self.used[c] | self.used[b])
+
+    def place(self, i, num):
+        if self.cells[i]:
+            self.erase(i)
+        bit = 1 << num
+        self.cells[i] = num
+        self.candidates[i] = 0
+        for u in CELL_UNITS[i]:
+            self.used[u] |= bit
+        for p in PEERS[i]:
+            self.candidates[p] &= ~bit
+
+    def erase(self, i):
+        num = self.cells[i]
+        if not num:
+            return
+        self.cells[i] = 0
+        for u in CELL_UNITS[i]:
+            self.used[u] &= ~(1 << num)
+        if any(self.eliminated):
+            # Earlier eliminations may have depended on this digit
+            self.eliminated = [0] * 81
+            self.candidates = [0 if num else self._allowed(p) for p, num in enumerate(self.cells)]
+            return
+        self.candidates[i] = self._allowed(i)
+        for p in PEERS[i]:
+            if not self.cells[p]:
+                self.candidates[p] = self._allowed(p)
+
+    def next_hint(self):
+        # The simplest deduction available now, or None. Hints are dicts with the technique, the cell
+        # and digit to place (placements) or the {cell: digits mask} to remove (eliminations), and a reason.
+        return (self._naked_single() or self._hidden_single() or self._locked_candidates()
+                or self._naked_pair())
+
+    def apply(self, hint):
+        if hint["cell"] is not None:
+            self.place(hint["cell"], hint["digit"])
+        for i, mask in hint["eliminations"].items():
+            self.eliminated[i] |= mask
+            self.candidates[i] &= ~mask
+
+    def _naked_single(self):
+        for i, cand in enumerate(self.candidates):
+            if BIT_COUNT[cand] == 1:
+                digit = cand.bit_length() - 1
+                return _placement(NAKED_SINGLE, i, digit,
+                                  f"{cell_name(i)} can only be {digit}: every other digit is ruled out by its row, column and box.")
+        return None
+
+    def _hidden_single(self):
+        candidates = self.candidates
+        for u, cells in enumerate(UNITS):
+            once = twice = 0
+            for i in cells:
+                twice |= once & candidates[i]
+                once |= candidates[i]
+            hidden = once & ~twice
+            if hidden:
+                bit = hidden & -hidden
+                digit = bit.bit_length() - 1
+                i = next(i for i in cells if candidates[i] & bit)
+                return _placement(HIDDEN_SINGLE, i, digit, f"{digit} can only go in {cell_name(i)} within {unit_name(u)}.")
+        return None
+
+    def _locked_candidates(self):
+        candidates = self.candidates
+        for technique in (POINTING, CLAIMING):
+            for box, line, shared, line_rest, box_rest in INTERSECTIONS:
+                inside = 0
+                for i in shared:
+                    inside |= candidates[i]
+                if not inside:
+                    continue
+                in_line = in_box = 0
+                for i in line_rest:
+                    in_line |= candidates[i]
+                for i in box_rest:
+                    in_box |= candidates[i]
+                if technique == POINTING:
+                    # Digits the box only has in this line can go nowhere else in the line
+                    locked, confined, targets = inside & ~in_box & in_line, box, line_rest
+                else:
+                    locked, confined, targets = inside & ~in_line & in_box, line, box_rest
+                if locked:
+                    bit = locked & -locked
+                    digit = bit.bit_length() - 1
+                    eliminations = {i: bit for i in targets if candidates[i] & bit}
+                    other = line if technique == POINTING else box
+                    return _elimination(technique, eliminations,
+                                        f"In {unit_name(confined)}, {digit} can only be in {unit_name(other)}, "
+                                        f"so it can be removed from {_cell_list(eliminations)}.")
+        return None
+
+    def _naked_pair(self):
+        candidates = self.candidates
+        for u, cells in enumerate(UNITS):
+            seen = {}
+            for i in cells:
+                cand = candidates[i]
+                if BIT_COUNT[cand] != 2:
+                    continue
+                if cand in seen:
+                    pair = (seen[cand], i)
+                    eliminations = {p: cand & candidates[p] for p in cells if p not in pair and cand & candidates[p]}
+                    if eliminations:
+                        a, b = digits_of(cand)
+                        return _elimination(NAKED_PAIR, eliminations,
+                                            f"{cell_name(pair[0])} and {cell_name(pair[1])} can only hold {a} and {b}, "
+                                            f"so both are removed from the rest of {unit_name(u)}: {_cell_list(eliminations)}.")
+                else:
+                    seen[cand] = i
+        return None
+
+def _placement(technique, i, digit, reason):
+    return {"technique": technique, "cell": i, "digit": digit, "eliminations": {}, "reason": reason}
+
+def _elimination(technique, eliminations, reason):
+    return {"technique": technique, "cell": None, "digit": None, "eliminations": eliminations, "reason": reason}
+
+def _cell_list(cells):
+    return ", ".join(cell_name(i) for i in cells)
@@ -0,0 +1,70 @@
+# history_model.py
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+
+HISTORY_COLUMNS = (("date", "Date"), ("difficulty", "Difficulty"), ("time", "Time (s)"), ("status", "Status"))
+HISTORY_PAGE_SIZE = 200
+
+class HistoryTableModel(QAbstractTableModel):
+    # Holds only the pages the view has scrolled to. Sorting and filtering open a new store query,
+    # and pages are read through run_io so the GUI thread never touches the log.
+    def __init__(self, query, rows, open_query, run_io, parent=None):
+        super().__init__(parent)
+        self.query = query
+        self.rows = rows
+        self.open_query = open_query
+        self.run_io = run_io
+        self.params = {"difficulty": query.filters.get("difficulty"), "status": query.filters.get("status"),
+                       "sort": query.sort, "descending": query.descending}
+        self.fetching = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HISTORY_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return str(self.rows[index.row()][HISTORY_COLUMNS[index.column()][0]])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HISTORY_COLUMNS[section][1]
+        return None
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and not self.fetching and not self.query.exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        query = self.query
+        self.fetching = True
+        self.run_io(query.fetch, HISTORY_PAGE_SIZE, then=lambda rows: self.add_rows(query, rows))
+
+    def add_rows(self, query, rows):
+        # Pages of a query replaced by a sort or filter change are dropped
+        if query is not self.query:
+            return
+        self.fetching = False
+        if rows:
+            self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+            self.rows.extend(rows)
+            self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.set_query(sort=HISTORY_COLUMNS[column][0], descending=order == Qt.DescendingOrder)
+
+    def set_filter(self, difficulty=None, status=None):
+        self.set_query(difficulty=difficulty, status=status)
+
+    def set_query(self, **changes):
+        params = dict(self.params, **changes)
+        if params == self.params:
+            return
+        self.params = params
+        self.beginResetModel()
+        self.query = self.open_query(**params)
+        self.rows = []
+        self.fetching = False
+        self.endResetModel()
+        self.fetchMore()
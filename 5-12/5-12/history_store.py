@@ -0,0 +1,322 @@
+# history_store.py
+import json
+import os
+import threading
+from array import array
+from board import DIFFICULTIES
+from storage import atomic_write_json, file_lock
+
+SORT_KEYS = ("date", "difficulty", "time", "status")
+READ_BLOCK = 1 << 16
+
+class HistoryStore:
+    # Line-delimited log of {"user": ..., <entry>} records behind a {"generation": n} header line.
+    # Compaction groups each user's records into one contiguous byte range, recorded in the .idx
+    # sidecar; records appended since then are indexed by byte span when the log is opened.
+    # Several app instances may share the log: appends and compaction swaps hold the .lock file,
+    # and a generation change means another instance compacted it, so our offsets are rebuilt.
+    def __init__(self, path='history.log', legacy_path='history.json', compact_after=1000):
+        self.path = path
+        self.index_path = f'{path}.idx'
+        self.lock_path = f'{path}.lock'
+        self.legacy_path = legacy_path
+        self.compact_after = compact_after
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._compacting = False
+        self._generation = 0
+        self._ranges = {}
+        self._tail = {}
+        self._tail_count = 0
+        self._end = 0
+
+    def append(self, username, entry):
+        line = (json.dumps({"user": username, **entry}) + '\n').encode()
+        with self._lock:
+            # Loading may migrate under the same lock file, and flock does not nest across opens
+            self._load()
+            with file_lock(self.lock_path), self._open('a+b') as file:
+                # Drop a torn record left behind by a crash mid-append
+                if os.fstat(file.fileno()).st_size != self._end:
+                    file.truncate(self._end)
+                file.write(line)
+                file.flush()
+                os.fsync(file.fileno())
+                self._tail.setdefault(username, []).append((self._end, self._end + len(line)))
+                self._tail_count += 1
+                self._end += len(line)
+
+            if self._tail_count >= self.compact_after and not self._compacting:
+                self._compacting = True
+                threading.Thread(target=self.compact, name='HistoryCompaction', daemon=True).start()
+
+    def get(self, username):
+        with self._lock, self._open() as file:
+            lines = []
+            for start, end in self._user_spans(username):
+                file.seek(start)
+                lines.extend(file.read(end - start).splitlines())
+
+        entries = [json.loads(line) for line in lines]
+        for entry in entries:
+            del entry["user"]
+        return entries
+
+    def size(self, username):
+        # Bytes of the user's records. Compaction moves records but keeps every byte, so this only
+        # changes when the user's history grows.
+        with self._lock, self._open():
+            return sum(end - start for start, end in self._user_spans(username))
+
+    def query(self, username, difficulty=None, status=None, sort="date", descending=False):
+        if sort not in SORT_KEYS:
+            raise ValueError(f"cannot sort history by {sort!r}")
+        return HistoryQuery(self, username, difficulty, status, sort, descending)
+
+    def compact(self):
+        try:
+            # The open file keeps the generation we indexed readable even if the log is replaced meanwhile
+            with self._lock:
+                file = self._open()
+                end = self._end
+                usernames = list(self._ranges) + [username for username in self._tail if username not in self._ranges]
+                spans = {username: self._user_spans(username) for username in usernames}
+                generation = self._generation + 1
+
+            with file:
+                # Copy raw record lines grouped by user, without holding the lock
+                grouped = {}
+                for username, user_spans in spans.items():
+                    chunks = grouped[username] = []
+                    for start, stop in user_spans:
+                        file.seek(start)
+                        chunks.append(file.read(stop - start))
+            tmp_path, new_ranges, compacted = self._write_compacted(grouped, generation)
+
+            with self._lock, file_lock(self.lock_path):
+                with open(self.path, 'rb') as src:
+                    if json.loads(src.readline())["generation"] != generation - 1:
+                        # Another instance compacted first; its log already has everything ours would
+                        os.remove(tmp_path)
+                        return
+                    # Carry over anything appended while we were compacting
+                    with open(tmp_path, 'ab') as dst:
+                        src.seek(end)
+                        dst.write(src.read())
+                        dst.flush()
+                        os.fsync(dst.fileno())
+                os.replace(tmp_path, self.path)
+                self._write_index(generation, compacted, new_ranges)
+        finally:
+            self._compacting = False
+
+    def _load(self):
+        if self._loaded:
+            return
+        with file_lock(self.lock_path):
+            if not os.path.exists(self.path):
+                self._migrate_legacy()
+        self._loaded = True
+
+    def _open(self, mode='rb'):
+        # Opens the log and brings the byte spans up to date with that very file
+        self._load()
+        file = open(self.path, mode)
+        try:
+            self._scan(file)
+        except BaseException:
+            file.close()
+            raise
+        return file
+
+    def _reset(self, generation, ranges, end):
+        self._generation = generation
+        self._ranges = ranges
+        self._tail = {}
+        self._tail_count = 0
+        self._end = end
+
+    def _read_index(self, generation, start):
+        try:
+            with open(self.index_path, 'r') as file:
+                index = json.load(file)
+            # An index from another generation describes a different file layout
+            if index["generation"] == generation:
+                return {username: tuple(span) for username, span in index["users"].items()}, index["compacted"]
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+        return {}, start
+
+    def _user_spans(self, username):
+        # Byte spans holding the user's records, oldest first
+        spans = [self._ranges[username]] if username in self._ranges else []
+        spans.extend(self._tail.get(username, ()))
+        return spans
+
+    def _scan(self, file):
+        file.seek(0)
+        generation = json.loads(file.readline())["generation"]
+        if generation != self._generation:
+            self._reset(generation, *self._read_index(generation, file.tell()))
+        if os.fstat(file.fileno()).st_size == self._end:
+            return
+        file.seek(self._end)
+        for line in file:
+            if not line.endswith(b'\n'):
+                break
+            self._tail.setdefault(json.loads(line)["user"], []).append((self._end, self._end + len(line)))
+            self._tail_count += 1
+            self._end += len(line)
+
+    def _migrate_legacy(self):
+        grouped = {}
+        try:
+            with open(self.legacy_path, 'r') as file:
+                history = json.load(file)
+        except FileNotFoundError:
+            history = {}
+        for username, entries in history.items():
+            grouped[username] = [(json.dumps({"user": username, **entry}) + '\n').encode() for entry in entries]
+
+        tmp_path, ranges, compacted = self._write_compacted(grouped, 1)
+        os.replace(tmp_path, self.path)
+        self._write_index(1, compacted, ranges)
+
+    def _write_compacted(self, grouped, generation):
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        ranges = {}
+        with open(tmp_path, 'wb') as file:
+            file.write((json.dumps({"generation": generation}) + '\n').encode())
+            for username, chunks in grouped.items():
+                start = file.tell()
+                file.writelines(chunks)
+                ranges[username] = (start, file.tell())
+            compacted = file.tell()
+            file.flush()
+            os.fsync(file.fileno())
+        return tmp_path, ranges, compacted
+
+    def _write_index(self, generation, compacted, ranges):
+        atomic_write_json(self.index_path, {"generation": generation, "compacted": compacted, "users": ranges})
+
+class HistoryQuery:
+    # One user's records, filtered and ordered by the store and read a page at a time. Date order is
+    # log order, so pages stream straight off the file from a byte cursor; any other order is built
+    # once from a scan that keeps only the matching records' offsets.
+    def __init__(self, store, username, difficulty=None, status=None, sort="date", descending=False):
+        self.store = store
+        self.username = username
+        self.filters = {key: value for key, value in (("difficulty", difficulty), ("status", status)) if value is not None}
+        self.sort = sort
+        self.descending = descending
+        self.exhausted = False
+        self._generation = None
+        self._spans = []
+        self._position = (0, None)
+        self._passed = 0
+        self._order = None
+        self._returned = 0
+
+    def matches(self, entry):
+        return all(entry[key] == value for key, value in self.filters.items())
+
+    def fetch(self, limit):
+        store = self.store
+        with store._lock, store._open() as file:
+            if self.sort == "date":
+                entries = self._fetch_streamed(file, limit)
+            else:
+                entries = self._fetch_sorted(file, limit)
+
+        if len(entries) < limit:
+            self.exhausted = True
+        for entry in entries:
+            del entry["user"]
+        return entries
+
+    def _fetch_streamed(self, file, limit):
+        skip = 0
+        if self._generation != self.store._generation:
+            # First fetch, or the log was compacted since: find our place again by record count
+            self._generation = self.store._generation
+            self._spans = self.store._user_spans(self.username)
+            if self.descending:
+                self._spans.reverse()
+            self._position = (0, None)
+            skip, self._passed = self._passed, 0
+
+        entries = []
+        for line in self._read_lines(file):
+            self._passed += 1
+            if skip:
+                skip -= 1
+                continue
+            entry = json.loads(line)
+            if self.matches(entry):
+                entries.append(entry)
+                if len(entries) == limit:
+                    break
+        return entries
+
+    def _read_lines(self, file):
+        # Yields record lines from the cursor on, moving the cursor past each line before yielding it
+        index, offset = self._position
+        while index < len(self._spans):
+            start, end = self._spans[index]
+            if not self.descending:
+                offset = start if offset is None else offset
+                file.seek(offset)
+                while offset < end:
+                    line = file.readline()
+                    offset += len(line)
+                    self._position = (index, offset)
+                    yield line
+            else:
+                offset = end if offset is None else offset
+                size = READ_BLOCK
+                while offset > start:
+                    low = max(start, offset - size)
+                    file.seek(low)
+                    lines = file.read(offset - low)[:-1].split(b'\n')
+                    if low > start:
+                        # The first piece may be the tail of a line that starts before this block
+                        lines = lines[1:]
+                        if not lines:
+                            size *= 2
+                            continue
+                    for line in reversed(lines):
+                        offset -= len(line) + 1
+                        self._position = (index, offset)
+                        yield line
+            index, offset = index + 1, None
+            self._position = (index, offset)
+
+    def _sort_key(self, entry):
+        value = entry[self.sort]
+        if self.sort == "difficulty":
+            # Easiest first rather than alphabetical; anything unrecognised goes last
+            return DIFFICULTIES.index(value) if value in DIFFICULTIES else len(DIFFICULTIES)
+        return value
+
+    def _fetch_sorted(self, file, limit):
+        if self._order is None or self._generation != self.store._generation:
+            self._generation = self.store._generation
+            keys = []
+            for start, end in self.store._user_spans(self.username):
+                file.seek(start)
+                offset = start
+                while offset < end:
+                    line = file.readline()
+                    entry = json.loads(line)
+                    if self.matches(entry):
+                        keys.append((self._sort_key(entry), offset))
+                    offset += len(line)
+            keys.sort(reverse=self.descending)
+            self._order = array('Q', (offset for _, offset in keys))
+
+        entries = []
+        for offset in self._order[self._returned:self._returned + limit]:
+            file.seek(offset)
+            entries.append(json.loads(file.readline()))
+        self._returned += len(entries)
+        return entries
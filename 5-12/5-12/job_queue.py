@@ -0,0 +1,68 @@
+# job_queue.py
+import threading
+from PyQt5.QtCore import QObject, pyqtSignal
+
+class JobQueue(QObject):
+    # Runs jobs (disk I/O, chart renders, solves) on one worker thread, in submission order. A job
+    # submitted under a key that is still queued replaces the queued one, so repeated saves of the
+    # same state are written once.
+    finished = pyqtSignal(str, object)
+    failed = pyqtSignal(str, str)
+    _completed = pyqtSignal(object, object)
+
+    def __init__(self, name='JobQueue'):
+        super().__init__()
+        self._jobs = {}
+        self._condition = threading.Condition()
+        self._busy = False
+        self._stopped = False
+        self._completed.connect(self._deliver)
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, fn, *args, callback=None):
+        # key=None never coalesces; callback(result) runs on the GUI thread once the job is done
+        with self._condition:
+            if key is None:
+                key = object()
+            else:
+                self._jobs.pop(key, None)
+            self._jobs[key] = (fn, args, callback)
+            self._condition.notify_all()
+
+    def flush(self, timeout=None):
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._jobs and not self._busy, timeout)
+
+    def stop(self):
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._jobs or self._stopped)
+                if not self._jobs:
+                    return
+                key = next(iter(self._jobs))
+                fn, args, callback = self._jobs.pop(key)
+                self._busy = True
+
+            name = key if isinstance(key, str) else fn.__name__
+            try:
+                result = fn(*args)
+            except Exception as e:
+                self.failed.emit(name, str(e))
+            else:
+                self.finished.emit(name, result)
+                if callback is not None:
+                    self._completed.emit(callback, result)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _deliver(self, callback, result):
+        callback(result)
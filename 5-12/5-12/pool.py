@@ -0,0 +1,91 @@
+# pool.py
+import threading
+from collections import deque
+from sudoku import DIFFICULTIES, generate_puzzle
+from canonical import CanonicalIndex, canonical_key
+
+# Draws allowed before a pool hands out a puzzle equivalent to one it has handed out already
+DUPLICATE_ATTEMPTS = 10
+# Canonical keys remembered for that check; past this the index starts over rather than growing forever
+SEEN_LIMIT = 10000
+
+class PuzzlePool:
+    # Keeps a few (puzzle, solution) pairs per difficulty ready on a background thread
+    def __init__(self, depth=3, generator=generate_puzzle, corpus=None):
+        self.depth = depth
+        self.generator = generator
+        self.corpus = corpus
+        self.hits = 0
+        self.misses = 0
+        self.duplicates = 0
+        self._seen = CanonicalIndex()
+        self._puzzles = {difficulty: deque() for difficulty in DIFFICULTIES}
+        self._lock = threading.Condition()
+        self._stopped = False
+        self._worker = threading.Thread(target=self._refill, name='PuzzlePool', daemon=True)
+        self._worker.start()
+
+    def get(self, difficulty):
+        with self._lock:
+            puzzles = self._puzzles[difficulty]
+            if puzzles:
+                self.hits += 1
+                puzzle = puzzles.popleft()
+            else:
+                self.misses += 1
+                puzzle = None
+            self._lock.notify()
+
+        # Pool ran dry: generate on the caller's thread
+        if puzzle is None:
+            puzzle = self._generate(difficulty)
+        return puzzle
+
+    def size(self, difficulty):
+        with self._lock:
+            return len(self._puzzles[difficulty])
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            self._lock.notify()
+        self._worker.join()
+
+    def _generate(self, difficulty):
+        # Skips puzzles equivalent to one already queued or handed out, which matters most for a corpus.
+        # Runs on the worker and, when the pool is dry, on the caller's thread: the canonical form is
+        # worked out unlocked, the index and counters are only touched under the lock.
+        for _ in range(DUPLICATE_ATTEMPTS):
+            puzzle = self._draw(difficulty)
+            try:
+                key = canonical_key(puzzle[0])
+            except ValueError:
+                # Too symmetric to canonicalize: hand it out unchecked
+                break
+            with self._lock:
+                if len(self._seen) >= SEEN_LIMIT:
+                    self._seen.clear()
+                if self._seen.add_key(key):
+                    break
+                self.duplicates += 1
+        return puzzle
+
+    def _draw(self, difficulty):
+        if self.corpus and self.corpus.counts[difficulty]:
+            board, solution, _ = self.corpus.random(difficulty)
+            return board, solution
+        return self.generator(difficulty)
+
+    def _refill(self):
+        while True:
+            with self._lock:
+                while not self._stopped and all(len(puzzles) >= self.depth for puzzles in self._puzzles.values()):
+                    self._lock.wait()
+                if self._stopped:
+                    return
+                difficulty = min(DIFFICULTIES, key=lambda d: len(self._puzzles[d]))
+
+            puzzle = self._generate(difficulty)
+
+            with self._lock:
+                self._puzzles[difficulty].append(puzzle)
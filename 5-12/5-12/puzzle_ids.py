@@ -0,0 +1,109 @@
+# puzzle_ids.py
+import base64
+import binascii
+from functools import lru_cache
+from board import Board, DIFFICULTIES, packed_bits
+from sudoku import GENERATOR_VERSION, SOLVE_NO_SOLUTION, SOLVE_SOLVED, SearchBudget, generate_puzzle, solve_with_budget
+
+# IDs are URL-safe base64 without padding. The first decoded byte says how the rest describes the puzzle:
+ID_SEED = 1   # generator version, side, difficulty, then the seed: regenerated on demand
+ID_CLUES = 2  # side, difficulty, a bitmap of the clue cells, then the clue digits bit-packed
+
+# Board sides an ID may carry. IDs are shared, so the decoder sees untrusted input and must stay cheap:
+# regenerating anything larger than 9x9 from its seed takes seconds, so those puzzles travel as clue IDs
+ID_SIDES = (9, 16, 25)
+SEED_ID_SIDES = (9,)
+# Search allowed to recover the solution of a clue ID. Plenty for 9x9 and 16x16 puzzles; the hardest
+# 25x25 ones can need more, and are refused rather than tying up the decoder.
+ID_SOLVE_TIME_LIMIT = 1.0
+
+# Decoded puzzles kept around; a seeded ID that misses costs a full generation
+PUZZLE_CACHE_SIZE = 256
+
+def seed_id(seed, difficulty, size=9):
+    if seed < 0:
+        raise ValueError(f"seed must not be negative, got {seed}")
+    if size not in SEED_ID_SIDES:
+        raise ValueError(f"seed IDs cannot carry a {size}x{size} board; use a clue ID")
+    header = bytes([ID_SEED, GENERATOR_VERSION, size, DIFFICULTIES.index(difficulty)])
+    return _encode(header + seed.to_bytes((seed.bit_length() + 7) // 8, 'big'))
+
+def clue_id(board, difficulty):
+    # Works for any puzzle, including ones that did not come from the generator
+    if board.size not in ID_SIDES:
+        raise ValueError(f"puzzle IDs support {ID_SIDES} boards, got {board.size}")
+    bits = packed_bits(board.size)
+    mask = values = clues = 0
+    for num in board.cells:
+        mask = mask << 1 | (num != 0)
+        if num:
+            values = values << bits | num
+            clues += 1
+    header = bytes([ID_CLUES, board.size, DIFFICULTIES.index(difficulty)])
+    return _encode(header + mask.to_bytes((len(board.cells) + 7) // 8, 'big')
+                   + values.to_bytes((clues * bits + 7) // 8, 'big'))
+
+def decode_puzzle_id(puzzle_id):
+    # Returns (puzzle, solution, difficulty); raises ValueError for an ID that does not describe a puzzle
+    try:
+        data = base64.urlsafe_b64decode(puzzle_id + '=' * (-len(puzzle_id) % 4))
+    except (binascii.Error, ValueError):
+        raise ValueError(f"{puzzle_id!r} is not a puzzle ID")
+
+    if data[:1] == bytes([ID_SEED]) and len(data) >= 4:
+        version, size, difficulty = data[1], data[2], _difficulty(puzzle_id, data[3])
+        if version != GENERATOR_VERSION:
+            raise ValueError(f"puzzle {puzzle_id} was made by generator version {version}, this is version {GENERATOR_VERSION}")
+        _side(puzzle_id, size, SEED_ID_SIDES)
+        board, solution = generate_puzzle(difficulty, size=size, seed=int.from_bytes(data[4:], 'big'))
+        return board, solution, difficulty
+
+    if data[:1] == bytes([ID_CLUES]) and len(data) >= 3:
+        size, difficulty = data[1], _difficulty(puzzle_id, data[2])
+        cells = _side(puzzle_id, size, ID_SIDES)
+        mask_size = (cells + 7) // 8
+        mask = int.from_bytes(data[3:3 + mask_size], 'big')
+        clues = bin(mask).count("1")
+        bits = packed_bits(size)
+        if len(data) != 3 + mask_size + (clues * bits + 7) // 8 or mask >> cells:
+            raise ValueError(f"puzzle {puzzle_id} is truncated or malformed")
+
+        values = int.from_bytes(data[3 + mask_size:], 'big')
+        board = Board(size=size)
+        for i in range(cells - 1, -1, -1):
+            if mask >> (cells - 1 - i) & 1:
+                board.cells[i] = values & ((1 << bits) - 1)
+                values >>= bits
+        if max(board.cells) > size:
+            raise ValueError(f"puzzle {puzzle_id} has a digit larger than {size}")
+        solution = board.copy()
+        outcome = solve_with_budget(solution, SearchBudget(ID_SOLVE_TIME_LIMIT))
+        if outcome == SOLVE_NO_SOLUTION:
+            raise ValueError(f"puzzle {puzzle_id} has no solution")
+        if outcome != SOLVE_SOLVED:
+            raise ValueError(f"puzzle {puzzle_id} took too long to solve")
+        return board, solution, difficulty
+
+    raise ValueError(f"{puzzle_id!r} is not a puzzle ID")
+
+@lru_cache(maxsize=PUZZLE_CACHE_SIZE)
+def _decode_cached(puzzle_id):
+    return decode_puzzle_id(puzzle_id)
+
+def puzzle_from_id(puzzle_id):
+    # Cached decode_puzzle_id. Boards are mutable, so every caller gets its own copies.
+    board, solution, difficulty = _decode_cached(puzzle_id)
+    return board.copy(), solution.copy(), difficulty
+
+def _encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _difficulty(puzzle_id, index):
+    if index >= len(DIFFICULTIES):
+        raise ValueError(f"puzzle {puzzle_id} has an unknown difficulty")
+    return DIFFICULTIES[index]
+
+def _side(puzzle_id, size, sides):
+    if size not in sides:
+        raise ValueError(f"puzzle {puzzle_id} has a {size}x{size} board")
+    return size * size
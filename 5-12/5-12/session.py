@@ -0,0 +1,138 @@
+# session.py
+import random
+from board import CELL_UNITS
+from hints import HintEngine
+
+# Kinds of move log records. Each record is (kind, cell, digit, time); for UNDO/REDO the cell and
+# digit are the ones the step restored, for CHECKPOINT only the elapsed time matters.
+PLACE = 1
+ERASE = 2
+MISTAKE = 3
+UNDO = 4
+REDO = 5
+CHECKPOINT = 6
+
+class GameSession:
+    def __init__(self, board, solution=None, game_id=None, errors=0):
+        self.board = board
+        self.puzzle = board.copy()
+        self.solution = solution
+        self.game_id = random.getrandbits(32) if game_id is None else game_id
+        # Mistakes made before this log started, e.g. in a save from before move logs existed
+        self.base_errors = errors
+        self.errors = errors
+        # Every move in order, plus the placements undo/redo can step through as (cell, before, after)
+        self.log = []
+        self.undo_stack = []
+        self.redo_stack = []
+        # Row/column/box occupancy bitsets (digit d is bit 1 << d) and counters kept in step with every move
+        self.used = [0] * 27
+        self.remaining_counts = {num: 9 for num in range(1, 10)}
+        self.empty = 0
+        for i, num in enumerate(board.cells):
+            if num:
+                self._add(i, num)
+            else:
+                self.empty += 1
+        self.hints = HintEngine(board)
+
+    def _add(self, i, num):
+        bit = 1 << num
+        for u in CELL_UNITS[i]:
+            self.used[u] |= bit
+        self.remaining_counts[num] -= 1
+
+    def _remove(self, i, num):
+        bit = ~(1 << num)
+        for u in CELL_UNITS[i]:
+            self.used[u] &= bit
+        self.remaining_counts[num] += 1
+
+    def _set(self, i, num):
+        current = self.board.cells[i]
+        if current:
+            self._remove(i, current)
+        else:
+            self.empty -= 1
+        if num:
+            self._add(i, num)
+        else:
+            self.empty += 1
+        self.board.cells[i] = num
+        if num:
+            self.hints.place(i, num)
+        else:
+            self.hints.erase(i)
+
+    def is_valid_move(self, row, col, num):
+        i = row * 9 + col
+        if self.solution is not None:
+            return self.solution.cells[i] == num
+        if self.board.cells[i] == num:
+            return True
+        r, c, b = CELL_UNITS[i]
+        return not (self.used[r] | self.used[c] | self.used[b]) & (1 << num)
+
+    def place(self, row, col, num, time=0):
+        self._change(PLACE, row * 9 + col, num, time)
+
+    def erase(self, row, col, time=0):
+        i = row * 9 + col
+        if self.board.cells[i]:
+            self._change(ERASE, i, 0, time)
+
+    def _change(self, kind, i, num, time):
+        self.undo_stack.append((i, self.board.cells[i], num))
+        self.redo_stack.clear()
+        self._set(i, num)
+        self.log.append((kind, i, num, time))
+
+    def mistake(self, row, col, num, time=0):
+        self.errors += 1
+        self.log.append((MISTAKE, row * 9 + col, num, time))
+
+    def undo(self, time=0):
+        # Returns the (row, col) that changed, or None when there is nothing to undo
+        if not self.undo_stack:
+            return None
+        i, before, after = self.undo_stack.pop()
+        self.redo_stack.append((i, before, after))
+        self._set(i, before)
+        self.log.append((UNDO, i, before, time))
+        return divmod(i, 9)
+
+    def redo(self, time=0):
+        if not self.redo_stack:
+            return None
+        i, before, after = self.redo_stack.pop()
+        self.undo_stack.append((i, before, after))
+        self._set(i, after)
+        self.log.append((REDO, i, after, time))
+        return divmod(i, 9)
+
+    def checkpoint(self, time):
+        if not self.log or self.log[-1][3] != time:
+            self.log.append((CHECKPOINT, 0, 0, time))
+
+    def elapsed(self):
+        return self.log[-1][3] if self.log else 0
+
+    def replay(self, log):
+        # Rebuilds board, counters and undo/redo stacks from a saved log
+        for kind, i, num, time in log:
+            row, col = divmod(i, 9)
+            if kind == PLACE:
+                self.place(row, col, num, time)
+            elif kind == ERASE:
+                self.erase(row, col, time)
+            elif kind == MISTAKE:
+                self.mistake(row, col, num, time)
+            elif kind == UNDO:
+                self.undo(time)
+            elif kind == REDO:
+                self.redo(time)
+            elif kind == CHECKPOINT:
+                self.checkpoint(time)
+
+    def is_complete(self):
+        return self.empty == 0
@@ -0,0 +1,66 @@
+# stats.py
+from bisect import bisect_left
+from board import DIFFICULTIES
+
+# Upper bounds (seconds) of the win-time histogram buckets, roughly 20% apart
+TIME_BUCKETS = [1]
+while TIME_BUCKETS[-1] < 100000:
+    TIME_BUCKETS.append(max(TIME_BUCKETS[-1] + 1, int(TIME_BUCKETS[-1] * 1.2)))
+
+def _empty_difficulty():
+    return {
+        "games": 0,
+        "wins": 0,
+        "losses": 0,
+        "total_time": 0,
+        "best_time": None,
+        "worst_time": None,
+        "histogram": [0] * len(TIME_BUCKETS),
+    }
+
+def empty_stats():
+    return {
+        "version": 0,
+        "games": 0,
+        "wins": 0,
+        "losses": 0,
+        "difficulties": {difficulty: _empty_difficulty() for difficulty in DIFFICULTIES},
+    }
+
+def record_game(stats, difficulty, time, status):
+    stats["version"] += 1
+    stats["games"] += 1
+    by_difficulty = stats["difficulties"].setdefault(difficulty, _empty_difficulty())
+    by_difficulty["games"] += 1
+    if status != "Win":
+        stats["losses"] += 1
+        by_difficulty["losses"] += 1
+        return
+
+    stats["wins"] += 1
+    by_difficulty["wins"] += 1
+    by_difficulty["total_time"] += time
+    if by_difficulty["best_time"] is None or time < by_difficulty["best_time"]:
+        by_difficulty["best_time"] = time
+    if by_difficulty["worst_time"] is None or time > by_difficulty["worst_time"]:
+        by_difficulty["worst_time"] = time
+    by_difficulty["histogram"][min(bisect_left(TIME_BUCKETS, time), len(TIME_BUCKETS) - 1)] += 1
+
+def average_time(by_difficulty):
+    return by_difficulty["total_time"] / by_difficulty["wins"] if by_difficulty["wins"] else 0
+
+def percentile_time(by_difficulty, q):
+    # Interpolated inside the histogram bucket holding the q-th win, clamped to best/worst
+    wins = by_difficulty["wins"]
+    if not wins:
+        return 0
+    rank = max(1, round(q * wins))
+    seen = 0
+    lower = 0
+    for bound, count in zip(TIME_BUCKETS, by_difficulty["histogram"]):
+        if seen + count >= rank:
+            estimate = round(lower + (bound - lower) * (rank - seen) / count)
+            return min(max(estimate, by_difficulty["best_time"]), by_difficulty["worst_time"])
+        seen += count
+        lower = bound
+    return by_difficulty["worst_time"]
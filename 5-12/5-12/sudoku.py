@@ -1,341 +1,483 @@
 import random
-from PyQt5.QtWidgets import QLineEdit, QGridLayout, QPushButton, QFrame, QMessageBox, QLabel, QVBoxLayout, QHBoxLayout
+import time
+from PyQt5.QtWidgets import QMessageBox, QProgressDialog
 from PyQt5.QtCore import Qt, QTimer
-from user import save_game_history, save_game_state
-import os
-
-def generate_sudoku_board(difficulty):
-    base = 3
+from math import isqrt
+from board import Board, CELL_UNITS, UNITS, board_units, DIFFICULTIES
+from exact_cover import solve_exact_cover, count_exact_cover
+from session import GameSession
+from game_view import GameView
+from board_widget import EDITABLE, FILLED
+from grader import grade_puzzle
+
+def generate_sudoku_board(difficulty, unique=True, size=9, seed=None):
+    return generate_puzzle(difficulty, unique, size, seed)[0]
+
+# Fresh puzzles tried before settling for one whose technique grade does not match the difficulty
+GRADE_ATTEMPTS = 20
+
+# Bump whenever a change to generation gives a different puzzle for the same seed: seeded puzzle IDs
+# record the version they were made with, and an ID from another version can no longer be regenerated
+GENERATOR_VERSION = 2
+
+def generate_puzzle(difficulty, unique=True, size=9, seed=None):
+    # Returns (puzzle, solution): the solution is the full grid the clues were cut from. The blank
+    # count only shapes the puzzle; the technique grade decides whether it fits the difficulty.
+    # The grader's techniques are 9x9 only, so larger boards go by blank count alone.
+    # The same seed always gives the same puzzle, as long as GENERATOR_VERSION stays the same.
+    rng = random.Random(seed) if seed is not None else random
+    if size != 9:
+        return _cut_puzzle(difficulty, unique, size, rng)
+    for _ in range(GRADE_ATTEMPTS):
+        puzzle, solution = _cut_puzzle(difficulty, unique, size, rng)
+        if not unique or grade_puzzle(puzzle)["difficulty"] == difficulty:
+            break
+    return puzzle, solution
+
+def _cut_puzzle(difficulty, unique, size=9, rng=random):
+    base = isqrt(size)
     side = base * base
 
     def pattern(r, c): return (base*(r % base)+r//base+c) % side
-    def shuffle(s): return random.sample(s, len(s))
+    def shuffle(s): return rng.sample(s, len(s))
 
     rBase = range(base)
     rows = [g*base + r for g in shuffle(rBase) for r in shuffle(rBase)]
     cols = [g*base + c for g in shuffle(rBase) for c in shuffle(rBase)]
     nums = shuffle(range(1, base*base+1))
 
-    board = [[nums[pattern(r, c)] for c in cols] for r in rows]
+    board = Board((nums[pattern(r, c)] for r in rows for c in cols), side)
+    solution = board.copy()
 
     squares = side*side
     empties = squares * 3//4 if difficulty == "hard" else squares * 2//3 if difficulty == "medium" else squares * 1//2
-    for p in random.sample(range(squares), empties):
-        board[p//side][p % side] = 0
+    if not unique:
+        for p in rng.sample(range(squares), empties):
+            board.cells[p] = 0
+        return board, solution
+
+    # Remove clues one at a time, keeping a removal only while the solution stays unique. A cell
+    # whose peers still hold every other digit can only go back one way, so it needs no search.
+    _, _, peers = board_units(side)
+    cells = board.cells
+    removed = 0
+    for p in rng.sample(range(squares), squares):
+        if removed == empties:
+            break
+        num = cells[p]
+        cells[p] = 0
+        if len({cells[q] for q in peers[p]} - {0}) == side - 1 or _is_unique(board, p, num):
+            removed += 1
+        else:
+            cells[p] = num
+
+    return board, solution
 
-    return board
+# Exact-cover nodes one uniqueness check may take while cutting a larger board. A check that runs
+# out keeps the clue, so the board stays provably unique and cheap to check again.
+CUT_NODE_LIMIT = 100
+
+def _is_unique(board, p, num):
+    # The board was unique with `num` at p, so it still is unless some solution puts another digit there
+    if board.size == 9:
+        return count_solutions(board) == 1
+    try:
+        return not count_exact_cover(board, 1, SearchBudget(None, CUT_NODE_LIMIT), exclude=p * board.size + num - 1)
+    except SearchAborted:
+        return False
 
 def is_valid_move(board, row, col, num):
-    for i in range(9):
-        if board[row][i] == num or board[i][col] == num:
+    cells = board.cells
+    _, _, peers = board_units(board.size)
+    for p in peers[row * board.size + col]:
+        if cells[p] == num:
             return False
-    start_row, start_col = 3 * (row // 3), 3 * (col // 3)
-    for i in range(3):
-        for j in range(3):
-            if board[start_row + i][start_col + j] == num:
-                return False
     return True
 
-def solve_sudoku(board):
-    empty = find_empty_location(board)
-    if not empty:
-        return True
-    row, col = empty
+# Bitmask solver tables: digit d is bit (1 << d), units are 9 rows, 9 columns, 9 boxes
+DIGITS = 0x3FE
+_ROW, _COL, _BOX = (list(units) for units in zip(*CELL_UNITS))
+_UNITS = UNITS
+_BIT_COUNT = [bin(m).count("1") for m in range(1 << 10)]
+_BIT_DIGIT = {1 << d: d for d in range(1, 10)}
+
+def _candidates(cells, used, i):
+    return DIGITS & ~(used[_ROW[i]] | used[_COL[i]] | used[_BOX[i]])
+
+def _assign(cells, used, i, bit):
+    cells[i] = _BIT_DIGIT[bit]
+    used[_ROW[i]] |= bit
+    used[_COL[i]] |= bit
+    used[_BOX[i]] |= bit
+
+def _load_state(board):
+    cells = bytearray(board.cells)
+    used = [0] * 27
+    for i, num in enumerate(cells):
+        if num:
+            bit = 1 << num
+            if (used[_ROW[i]] | used[_COL[i]] | used[_BOX[i]]) & bit:
+                return None
+            used[_ROW[i]] |= bit
+            used[_COL[i]] |= bit
+            used[_BOX[i]] |= bit
+    return cells, used
+
+def _propagate(cells, used):
+    # Fill naked and hidden singles until stuck. Returns (ok, most constrained empty cell or None)
+    while True:
+        changed = False
+        best, best_count = None, 10
+        for i in range(81):
+            if cells[i]:
+                continue
+            cand = _candidates(cells, used, i)
+            if not cand:
+                return False, None
+            if not cand & (cand - 1):
+                _assign(cells, used, i, cand)
+                changed = True
+            elif _BIT_COUNT[cand] < best_count:
+                best, best_count = i, _BIT_COUNT[cand]
+        if changed:
+            continue
+
+        for u, unit in enumerate(_UNITS):
+            once = twice = 0
+            for i in unit:
+                if not cells[i]:
+                    cand = _candidates(cells, used, i)
+                    twice |= once & cand
+                    once |= cand
+            if (once | used[u]) != DIGITS:
+                return False, None
+            hidden = once & ~twice
+            while hidden:
+                bit = hidden & -hidden
+                hidden ^= bit
+                for i in unit:
+                    if not cells[i] and _candidates(cells, used, i) & bit:
+                        _assign(cells, used, i, bit)
+                        changed = True
+                        break
+                else:
+                    return False, None
+        if not changed:
+            return True, best
+
+def _search(cells, used, budget=None):
+    if budget is not None:
+        budget.charge()
+    ok, cell = _propagate(cells, used)
+    if not ok:
+        return None
+    if cell is None:
+        return cells
+
+    cand = _candidates(cells, used, cell)
+    while cand:
+        bit = cand & -cand
+        cand ^= bit
+        next_cells, next_used = cells[:], used[:]
+        _assign(next_cells, next_used, cell, bit)
+        solved = _search(next_cells, next_used, budget)
+        if solved:
+            return solved
+    return None
 
-    for num in range(1, 10):
-        if is_valid_move(board, row, col, num):
-            board[row][col] = num
-            if solve_sudoku(board):
-                return True
-            board[row][col] = 0
+def solve_sudoku(board):
+    # The bitmask solver is built for 9x9; other sizes go to the exact-cover solver. Some larger boards
+    # still take it far longer than any caller would wait, so that search runs under the default
+    # SearchBudget and raises SearchAborted when it runs out; solve_with_budget reports it as an outcome.
+    if board.size != 9:
+        return solve_exact_cover(board, SearchBudget())
+    state = _load_state(board)
+    if state is None:
+        return False
+    solved = _search(*state)
+    if not solved:
+        return False
+
+    board.cells[:] = solved
+    return True
 
-    return False
+# Outcomes of solve_with_budget
+SOLVE_SOLVED = "solved"
+SOLVE_NO_SOLUTION = "no solution"
+SOLVE_TIMED_OUT = "timed out"
+SOLVE_CANCELLED = "cancelled"
+
+SOLVE_TIME_LIMIT = 5.0
+SOLVE_NODE_LIMIT = 2000000
+
+class SearchAborted(Exception):
+    pass
+
+class SearchBudget:
+    # Counts search nodes and stops the search once a limit is hit or cancel() is called, from any thread
+    def __init__(self, time_limit=SOLVE_TIME_LIMIT, max_nodes=SOLVE_NODE_LIMIT):
+        self.time_limit = time_limit
+        self.max_nodes = max_nodes
+        self.nodes = 0
+        self.cancelled = False
+        self.started = time.monotonic()
+        self.deadline = self.started + time_limit if time_limit is not None else None
+
+    def cancel(self):
+        self.cancelled = True
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def charge(self):
+        self.nodes += 1
+        if self.cancelled:
+            raise SearchAborted(SOLVE_CANCELLED)
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchAborted(SOLVE_TIMED_OUT)
+        # Reading the clock on every node would cost more than the node itself
+        if self.deadline is not None and not self.nodes & 0xFF and time.monotonic() > self.deadline:
+            raise SearchAborted(SOLVE_TIMED_OUT)
+
+def solve_with_budget(board, budget):
+    # Like solve_sudoku, but gives up when the budget runs out; returns one of the SOLVE_* outcomes
+    try:
+        if board.size != 9:
+            return SOLVE_SOLVED if solve_exact_cover(board, budget) else SOLVE_NO_SOLUTION
+        state = _load_state(board)
+        if state is None:
+            return SOLVE_NO_SOLUTION
+        solved = _search(*state, budget)
+    except SearchAborted as e:
+        return e.args[0]
+    if not solved:
+        return SOLVE_NO_SOLUTION
+
+    board.cells[:] = solved
+    return SOLVE_SOLVED
+
+def _count(cells, used, limit):
+    ok, cell = _propagate(cells, used)
+    if not ok:
+        return 0
+    if cell is None:
+        return 1
+
+    total = 0
+    cand = _candidates(cells, used, cell)
+    while cand and total < limit:
+        bit = cand & -cand
+        cand ^= bit
+        next_cells, next_used = cells[:], used[:]
+        _assign(next_cells, next_used, cell, bit)
+        total += _count(next_cells, next_used, limit - total)
+    return total
+
+def count_solutions(board, limit=2):
+    # Stops as soon as `limit` solutions are found, so limit=2 is a cheap uniqueness check
+    if board.size != 9:
+        # Under the default SearchBudget, like solve_sudoku
+        return count_exact_cover(board, limit, SearchBudget())
+    state = _load_state(board)
+    if state is None:
+        return 0
+    return _count(*state, limit)
 
 def find_empty_location(board):
-    for row in range(9):
-        for col in range(9):
-            if board[row][col] == 0:
-                return (row, col)
-    return None
+    i = board.cells.find(0)
+    if i == -1:
+        return None
+    return divmod(i, board.size)
 
 def update_timer(app):
     app.start_time += 1
-    app.timer_label.setText(f"Time: {app.start_time}s")
+    app.game_view.timer_label.setText(f"Time: {app.start_time}s")
     if app.start_time > 100000:
         app.timer.stop()
         QMessageBox.warning(app, 'Game Over', 'You have exceeded the time limit. You lose!')
-        save_game_history(app.username, app.difficulty, app.start_time, "Lose")
+        app.record_game(app.difficulty, "Lose")
         app.show_difficulty_levels()
-        if os.path.exists(f'{app.username}_game_state.json'):
-            os.remove(f'{app.username}_game_state.json')
-
-def display_sudoku(app, board, difficulty, start_time=0, errors=0, remaining_counts=None, user_input=None):
+        app.discard_saved_game()
+
+def create_game_view(app):
+    view = GameView(app)
+    view.cell_selected.connect(lambda row, col: select_cell(app, row, col))
+    view.cell_edited.connect(lambda row, col, num: validate_input(app, row, col, num))
+    view.number_clicked.connect(app.handle_number_click)
+    view.solve_clicked.connect(lambda: solve_and_display(app, app.session.board, app.difficulty))
+    view.save_clicked.connect(lambda: save_and_confirm(app, app.session.board, app.difficulty))
+    view.back_clicked.connect(lambda: handle_back(app))
+    view.undo_clicked.connect(lambda: refresh_cell(app, app.session.undo(app.start_time)))
+    view.redo_clicked.connect(lambda: refresh_cell(app, app.session.redo(app.start_time)))
+    view.hint_clicked.connect(lambda: show_hint(app))
+    return view
+
+def display_sudoku(app, board, difficulty, solution=None, game_id=None, errors=0, moves=()):
+    # A resumed game passes the saved move log, which is replayed on top of the puzzle
     app.clear_layout()
 
-    app.sudoku_grid_layout = QGridLayout()
-    app.sudoku_grid_layout.setSpacing(1)
     app.selected_cell = None
-    app.errors = errors
-    app.start_time = start_time
-    app.timer = QTimer()
-    app.timer.timeout.connect(lambda: update_timer(app))
-    app.timer.start(1000)
-
     app.difficulty = difficulty
+    app.session = GameSession(board, solution, game_id, errors)
+    app.session.replay(moves)
+    app.errors = app.session.errors
+    app.start_time = app.session.elapsed()
+
+    # The game screen is built on first use and only reloaded afterwards
+    if app.game_view is None:
+        app.game_view = create_game_view(app)
+    app.number_buttons = app.game_view.number_buttons
+    app.game_view.load(app.session.puzzle, app.session.board)
+    app.game_view.board.set_candidates(app.session.hints.candidates)
+    app.game_view.timer_label.setText(f"Time: {app.start_time}s")
+    app.game_view.error_label.setText(f"Errors: {app.errors}")
+    app.layout.addWidget(app.game_view)
+    app.game_view.show()
+
+    if app.timer is None:
+        app.timer = QTimer(app)
+        app.timer.timeout.connect(lambda: update_timer(app))
+    app.timer.start(1000)
 
-    if remaining_counts is None:
-        app.remaining_counts = {i: 9 for i in range(1, 10)}
-        for row in board:
-            for num in row:
-                if num != 0:
-                    app.remaining_counts[num] -= 1
+def select_cell(app, row, col):
+    app.selected_cell = (row, col)
+
+def refresh_cell(app, cell):
+    # Redraws a cell changed by undo/redo
+    if cell is None:
+        return
+    row, col = cell
+    num = app.session.board[row, col]
+    app.game_view.board.set_cell(row, col, num, FILLED if num else EDITABLE)
+    app.game_view.board.set_candidates(app.session.hints.candidates)
+    app.update_remaining_counts()
+    app.request_autosave()
+
+def show_hint(app):
+    hint = app.session.hints.next_hint()
+    if hint is None:
+        QMessageBox.information(app, 'Hint', 'No further step can be found with the techniques the hint engine knows.')
+        return
+    if hint["cell"] is not None:
+        app.game_view.board.select(*divmod(hint["cell"], 9))
     else:
-        app.remaining_counts = remaining_counts
-
-    def select_cell(event, cell):
-        app.selected_cell = cell
-
-    def validate_input(cell, row, col):
-        text = cell.text()
-        if text.isdigit() and 1 <= int(text) <= 9:
-            num = int(text)
-            if num not in app.remaining_counts:
-                app.remaining_counts[num] = 9
-            if is_valid_move(board, row, col, num):
-                if board[row][col] != 0:
-                    app.remaining_counts[board[row][col]] += 1
-                board[row][col] = num
-                app.remaining_counts[num] -= 1
-                app.update_remaining_counts()
-                
-                # Lock the cell after valid input
-                cell.setReadOnly(True)
-                cell.setStyleSheet("""
-                    QLineEdit {
-                        background-color: #e8f5e9;  /* Light green background */
-                        color: #2e7d32;  /* Dark green text */
-                        font-weight: bold;
-                    }
-                """)
-                
-                if not find_empty_location(board):
-                    app.timer.stop()
-                    QMessageBox.information(app, 'Congratulations', 'You have solved the Sudoku puzzle!')
-                    save_game_history(app.username, difficulty, app.start_time, "Win")
-                    app.show_difficulty_levels()
-                    if os.path.exists(f'{app.username}_game_state.json'):
-                        os.remove(f'{app.username}_game_state.json')
-            else:
-                QMessageBox.warning(app, 'Invalid Move', 'This move is not valid.')
-                cell.blockSignals(True)
-                cell.setText("")
-                cell.blockSignals(False)
-                app.errors += 1
-                app.error_label.setText(f"Errors: {app.errors}")
-                if app.errors > 3:
-                    app.timer.stop()
-                    QMessageBox.warning(app, 'Game Over', 'You have made too many mistakes. You lose!')
-                    save_game_history(app.username, difficulty, app.start_time, "Lose")
-                    app.show_difficulty_levels()
-                    if os.path.exists(f'{app.username}_game_state.json'):
-                        os.remove(f'{app.username}_game_state.json')
-        else:
-            QMessageBox.warning(app, 'Invalid Input', 'Please enter a number between 1 and 9.')
-            cell.blockSignals(True)
-            cell.setText("")
-            cell.blockSignals(False)
-            app.errors += 1
-            app.error_label.setText(f"Errors: {app.errors}")
-            if app.errors > 3:
+        # Eliminations are applied straight away and show up in the pencil marks
+        app.session.hints.apply(hint)
+        app.game_view.board.set_candidates(app.session.hints.candidates)
+    QMessageBox.information(app, f'Hint: {hint["technique"].capitalize()}', hint["reason"])
+
+def record_error(app, row, col, num):
+    app.session.mistake(row, col, num, app.start_time)
+    app.errors = app.session.errors
+    app.game_view.error_label.setText(f"Errors: {app.errors}")
+    if app.errors > 3:
+        app.timer.stop()
+        QMessageBox.warning(app, 'Game Over', 'You have made too many mistakes. You lose!')
+        app.record_game(app.difficulty, "Lose")
+        app.show_difficulty_levels()
+        app.discard_saved_game()
+    else:
+        app.request_autosave()
+
+def validate_input(app, row, col, num):
+    if 1 <= num <= 9:
+        if app.session.is_valid_move(row, col, num):
+            app.session.place(row, col, num, app.start_time)
+            app.update_remaining_counts()
+
+            # Lock the cell after valid input
+            app.game_view.board.set_cell(row, col, num, FILLED)
+            app.game_view.board.set_candidates(app.session.hints.candidates)
+
+            if app.session.is_complete():
                 app.timer.stop()
-                QMessageBox.warning(app, 'Game Over', 'You have made too many mistakes. You lose!')
-                save_game_history(app.username, difficulty, app.start_time, "Lose")
+                QMessageBox.information(app, 'Congratulations', 'You have solved the Sudoku puzzle!')
+                app.record_game(app.difficulty, "Win")
                 app.show_difficulty_levels()
-                if os.path.exists(f'{app.username}_game_state.json'):
-                    os.remove(f'{app.username}_game_state.json')
-
-    app.cells = []
-    for row in range(9):
-        row_cells = []
-        for col in range(9):
-            cell = QLineEdit(app)
-            # Set alignment and size
-            cell.setAlignment(Qt.AlignCenter)
-            cell.setFixedSize(60, 60)
-            border_style = "border: 1px solid #4CAF50;"
-
-            if row % 3 == 0:
-                border_style += "border-top: 3px solid #0000FF;"
-            if col % 3 == 0:
-                border_style += "border-left: 3px solid #0000FF;"
-            if row == 8:
-                border_style += "border-bottom: 3px solid #0000FF;"
-            if col == 8:
-                border_style += "border-right: 3px solid #0000FF;"
-
-            cell.setStyleSheet(f"""
-                QLineEdit {{
-                    {border_style}
-                    font-size: 24px;
-                    background-color: #ffffff;
-                    font-weight: bold;
-                }}
-                QLineEdit[readOnly="true"] {{
-                    background-color: #e0e0e0;
-                }}
-            """)
-
-            cell.mousePressEvent = lambda event, cell=cell: select_cell(event, cell)
-            if board[row][col] != 0:
-                cell.setText(str(board[row][col]))
-                if user_input and user_input[row][col]:
-                    cell.setReadOnly(False)
-                else:
-                    cell.setReadOnly(True)
-            cell.textChanged.connect(lambda _, cell=cell, row=row, col=col: validate_input(cell, row, col))
-            app.sudoku_grid_layout.addWidget(cell, row, col)
-            row_cells.append(cell)
-        app.cells.append(row_cells)
-
-    app.layout.addLayout(app.sudoku_grid_layout)
-
-    app.number_buttons_layout = QGridLayout()
-    app.number_buttons_layout.setSpacing(10)
-    app.number_buttons = []
-    for i in range(1, 10):
-        button = QPushButton(f"{i}", app)
-        button.setStyleSheet(f"""
-            QPushButton {{
-                background-color: #4CAF50;
-                color: white;
-                border: none;
-                padding: 15px;
-                text-align: center;
-                text-decoration: none;
-                display: inline-block;
-                font-size: 18px;
-                margin: 4px 2px;
-                cursor: pointer;
-                border-radius: 8px;
-            }}
-            QPushButton:hover {{
-                background-color: #45a049;
-            }}
-        """)
-        button.clicked.connect(lambda _, num=i: app.handle_number_click(num))
-        app.number_buttons_layout.addWidget(button, (i-1)//3, (i-1)%3)
-        app.number_buttons.append(button)
-
-    app.layout.addLayout(app.number_buttons_layout)
-
-    solve_button = QPushButton('Solve Sudoku', app)
-    solve_button.setStyleSheet(f"""
-        QPushButton {{
-            background-color: #2196F3;
-            color: white;
-            border: none;
-            padding: 15px;
-            text-align: center;
-            text-decoration: none;
-            display: inline-block;
-            font-size: 18px;
-            margin: 4px 2px;
-            cursor: pointer;
-            border-radius: 8px;
-        }}
-        QPushButton:hover {{
-            background-color: #1976D2;
-        }}
-    """)
-    solve_button.clicked.connect(lambda: solve_and_display(app, board, difficulty))
-    app.layout.addWidget(solve_button)
-
-    save_button = QPushButton('Save Game', app)
-    save_button.setStyleSheet(f"""
-        QPushButton {{
-            background-color: #FF9800;
-            color: white;
-            border: none;
-            padding: 15px;
-            text-align: center;
-            text-decoration: none;
-            display: inline-block;
-            font-size: 18px;
-            margin: 4px 2px;
-            cursor: pointer;
-            border-radius: 8px;
-        }}
-        QPushButton:hover {{
-            background-color: #FB8C00;
-        }}
-    """)
-    save_button.clicked.connect(lambda: save_and_confirm(app, board, difficulty))
-    app.layout.addWidget(save_button)
-
-    def handle_back():
-        reply = QMessageBox.question(app, 'Save Game', 
-                                   'Do you want to save the game before leaving?',
-                                   QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
-        
-        if reply == QMessageBox.Yes:
-            save_game_state(app, board, difficulty)
-            app.show_difficulty_levels()
-        elif reply == QMessageBox.No:
-            if os.path.exists(f'{app.username}_game_state.json'):
-                os.remove(f'{app.username}_game_state.json')
-            app.show_difficulty_levels()
-        # If Cancel, do nothing and stay in game
-    
-    back_button = QPushButton('Back', app)
-    back_button.setStyleSheet(f"""
-        QPushButton {{
-            background-color: #f44336;
-            color: white;
-            border: none;
-            padding: 15px;
-            text-align: center;
-            text-decoration: none;
-            display: inline-block;
-            font-size: 18px;
-            margin: 4px 2px;
-            cursor: pointer;
-            border-radius: 8px;
-        }}
-        QPushButton:hover {{
-            background-color: #d32f2f;
-        }}
-    """)
-    back_button.clicked.connect(handle_back)
-    app.layout.addWidget(back_button)
-
-    app.timer_label = QLabel(f"Time: {app.start_time}s", app)
-    app.layout.addWidget(app.timer_label)
-
-    app.error_label = QLabel(f"Errors: {app.errors}", app)
-    app.layout.addWidget(app.error_label)
+                app.discard_saved_game()
+            else:
+                app.request_autosave()
+        else:
+            QMessageBox.warning(app, 'Invalid Move', 'This move is not valid.')
+            record_error(app, row, col, num)
+    else:
+        QMessageBox.warning(app, 'Invalid Input', 'Please enter a number between 1 and 9.')
+        record_error(app, row, col, num)
 
-def save_and_confirm(app, board, difficulty):
-    save_game_state(app, board, difficulty)
-    QMessageBox.information(app, 'Saved', 'Game has been saved successfully.')
+def handle_back(app):
+    reply = QMessageBox.question(app, 'Save Game',
+                               'Do you want to save the game before leaving?',
+                               QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel)
+
+    if reply == QMessageBox.Yes:
+        app.save_game(app.session.board, app.difficulty)
+        app.show_difficulty_levels()
+    elif reply == QMessageBox.No:
+        app.discard_saved_game()
+        app.show_difficulty_levels()
+    # If Cancel, do nothing and stay in game
 
-def solve_and_display(app, board, difficulty):
-    start_time = app.start_time
-    if solve_sudoku(board):
+def save_and_confirm(app, board, difficulty):
+    app.save_game(board, difficulty, callback=lambda _: QMessageBox.information(app, 'Saved', 'Game has been saved successfully.'))
+
+def solve_and_display(app, board, difficulty, time_limit=SOLVE_TIME_LIMIT, max_nodes=SOLVE_NODE_LIMIT):
+    # Puzzles normally carry their solution. Otherwise the search runs on the solver thread on a copy
+    # of the board, and a progress dialog appears if it takes a while
+    if app.solve_budget is not None:
+        return
+    app.timer.stop()
+    if app.session.solution is not None:
+        show_solve_result(app, app.session.solution, difficulty, SOLVE_SOLVED, None)
+        return
+
+    budget = app.solve_budget = SearchBudget(time_limit, max_nodes)
+    screen_id = app.screen_id
+    solution = board.copy()
+
+    progress = QProgressDialog('Solving...', 'Cancel', 0, 0, app)
+    progress.setWindowTitle('Solve Sudoku')
+    progress.setWindowModality(Qt.WindowModal)
+    progress.setValue(0)
+    progress.setMinimumDuration(300)
+    progress.canceled.connect(budget.cancel)
+    progress.poll = QTimer(progress)
+    progress.poll.timeout.connect(lambda: progress.setLabelText(f'Solving... {budget.nodes:,} positions explored'))
+    progress.poll.start(100)
+    app.solve_progress = progress
+
+    def finished(outcome):
+        end_solve(app)
+        if app.screen_id == screen_id:
+            show_solve_result(app, solution, difficulty, outcome, budget)
+    app.solver.submit('solve', solve_with_budget, solution, budget, callback=finished)
+
+def end_solve(app):
+    # Closes the progress dialog and frees Solve for another try, however the search ended
+    app.solve_budget = None
+    progress, app.solve_progress = app.solve_progress, None
+    if progress is not None:
+        progress.poll.stop()
+        progress.canceled.disconnect()
+        progress.cancel()
+        progress.deleteLater()
+
+def show_solve_result(app, solution, difficulty, outcome, budget):
+    if outcome == SOLVE_SOLVED:
         for row in range(9):
             for col in range(9):
-                cell = app.cells[row][col]
-                if not cell.isReadOnly():
-                    cell.blockSignals(True)
-                    cell.setText(str(board[row][col]))
-                    cell.blockSignals(False)
-        app.timer.stop()
+                if app.game_view.board.is_editable(row, col):
+                    app.game_view.board.set_cell(row, col, solution[row, col], FILLED)
         QMessageBox.information(app, 'Congratulations', 'You have solved the Sudoku puzzle!')
-        save_game_history(app.username, difficulty, app.start_time, "Win")
+        app.record_game(difficulty, "Win")
         app.show_difficulty_levels()
+        app.discard_saved_game()
+    elif outcome == SOLVE_NO_SOLUTION:
+        QMessageBox.warning(app, 'Unsolvable', f'This Sudoku puzzle cannot be solved ({budget.nodes:,} positions explored).')
+        app.record_game(difficulty, "Lose")
+        app.discard_saved_game()
     else:
-        app.timer.stop()
-        QMessageBox.warning(app, 'Unsolvable', 'This Sudoku puzzle cannot be solved.')
-        save_game_history(app.username, difficulty, app.start_time, "Lose")
-
-    if os.path.exists(f'{app.username}_game_state.json'):
-        os.remove(f'{app.username}_game_state.json')
\ No newline at end of file
+        # Timed out or cancelled: nothing is recorded and the game carries on
+        if outcome == SOLVE_TIMED_OUT:
+            QMessageBox.warning(app, 'Solver Timed Out',
+                                f'No solution found after exploring {budget.nodes:,} positions in {budget.elapsed():.1f}s.')
+        app.timer.start(1000)
@@ -1,22 +1,41 @@
 # ui.py
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QGridLayout, QTableWidget, QTableWidgetItem, QHBoxLayout, QSpacerItem, QSizePolicy, QDesktopWidget
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QGridLayout, QTableView, QHeaderView, QComboBox, QHBoxLayout, QSpacerItem, QSizePolicy, QDesktopWidget
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QFont, QPixmap
 from PyQt5.QtWidgets import QDesktopWidget
-from sudoku import generate_sudoku_board, display_sudoku
-from user import check_username, get_game_history, save_game_state, load_game_state
-import os
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+from sudoku import display_sudoku, end_solve
+from user import login, query_game_history, get_statistics, save_game_history, snapshot_game_state, save_game_state, load_game_state, delete_game_state
+from job_queue import JobQueue
+from stats import percentile_time
+from charts import render_statistics_chart
+from history_model import HistoryTableModel, HISTORY_PAGE_SIZE
+from board import DIFFICULTIES
+from pool import PuzzlePool
+from corpus import open_corpus
+
+AUTOSAVE_INTERVAL_MS = 5000
 
 class SudokuApp(QWidget):
     def __init__(self):
         super().__init__()
-        self.sudoku_grid_layout = None
         self.selected_cell = None
-        self.number_buttons_layout = None
+        self.game_view = None
         self.timer = None
+        self.screen_id = 0
+        self.has_saved_game = False
+        self.puzzle_pool = PuzzlePool(corpus=open_corpus('puzzles.corpus'))
+        self.persistence = JobQueue(name='Persistence')
+        self.persistence.failed.connect(self.storage_failed)
+        self.chart_renderer = JobQueue(name='ChartRenderer')
+        self.chart_renderer.failed.connect(lambda job, error: QMessageBox.warning(self, 'Chart Error', f'{job} failed: {error}'))
+        self.chart_cache = {}
+        self.solver = JobQueue(name='Solver')
+        self.solver.failed.connect(self.solve_failed)
+        self.solve_budget = None
+        self.solve_progress = None
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.setSingleShot(True)
+        self.autosave_timer.timeout.connect(self.autosave)
         self.initUI()
         self.center()
 
@@ -127,7 +146,7 @@ class SudokuApp(QWidget):
         play_button.clicked.connect(self.show_difficulty_levels)
         self.layout.addWidget(play_button)
 
-        if os.path.exists(f'{self.username}_game_state.json'):
+        if self.has_saved_game:
             continue_button = QPushButton('Continue', self)
             continue_button.clicked.connect(self.continue_game)
             self.layout.addWidget(continue_button)
@@ -150,14 +169,57 @@ class SudokuApp(QWidget):
             QMessageBox.warning(self, 'Warning', 'Please enter a username')
             return
 
-        if check_username(username):
+        self.submit_button.setEnabled(False)
+        self.persistence.submit(None, login, username, callback=lambda result: self.finish_login(username, *result))
+
+    def storage_failed(self, job, error):
+        QMessageBox.warning(self, 'Storage Error', f'{job} failed: {error}')
+        # A failed login leaves the user on the login screen, free to try again
+        if job == login.__name__:
+            self.submit_button.setEnabled(True)
+
+    def solve_failed(self, job, error):
+        end_solve(self)
+        QMessageBox.warning(self, 'Solver Error', f'{job} failed: {error}')
+        # The game carries on, as after a timed-out search
+        if self.game_view is not None and self.game_view.isVisible():
+            self.timer.start(1000)
+
+    def finish_login(self, username, existed, has_saved_game):
+        if existed:
             QMessageBox.information(self, 'Welcome', f'Welcome back, {username}!')
         else:
             QMessageBox.information(self, 'Welcome', f'Hello, new user {username}!')
 
         self.username = username
+        self.has_saved_game = has_saved_game
         self.show_main_menu()
 
+    def run_io(self, fn, *args, then):
+        # Runs fn on the persistence queue; `then` is skipped if the user has left this screen meanwhile
+        screen_id = self.screen_id
+        self.persistence.submit(None, fn, *args, callback=lambda result: then(result) if self.screen_id == screen_id else None)
+
+    def record_game(self, difficulty, status):
+        self.persistence.submit(None, save_game_history, self.username, difficulty, self.start_time, status)
+
+    def save_game(self, board, difficulty, callback=None):
+        game_state = snapshot_game_state(self, difficulty)
+        self.persistence.submit(f'{self.username}_game_state', save_game_state, self.username, game_state, callback=callback)
+        self.has_saved_game = True
+
+    def request_autosave(self):
+        # Debounced: one save per AUTOSAVE_INTERVAL_MS covers every move made in between
+        if not self.autosave_timer.isActive():
+            self.autosave_timer.start(AUTOSAVE_INTERVAL_MS)
+
+    def autosave(self):
+        self.save_game(self.session.board, self.difficulty)
+
+    def discard_saved_game(self):
+        self.persistence.submit(f'{self.username}_game_state', delete_game_state, self.username)
+        self.has_saved_game = False
+
     def show_main_menu(self):
         self.clear_layout()
 
@@ -165,7 +227,7 @@ class SudokuApp(QWidget):
         play_button.clicked.connect(self.show_difficulty_levels)
         self.layout.addWidget(play_button)
 
-        if os.path.exists(f'{self.username}_game_state.json'):
+        if self.has_saved_game:
             continue_button = QPushButton('Continue', self)
             continue_button.clicked.connect(self.continue_game)
             self.layout.addWidget(continue_button)
@@ -183,26 +245,18 @@ class SudokuApp(QWidget):
         self.layout.addWidget(exit_button)
 
     def clear_layout(self):
+        self.screen_id += 1
+        self.autosave_timer.stop()
         if self.timer:
             self.timer.stop()
 
-        if self.sudoku_grid_layout:
-            for i in reversed(range(self.sudoku_grid_layout.count())):
-                widget = self.sudoku_grid_layout.itemAt(i).widget()
-                if widget is not None:
-                    widget.deleteLater()
-            self.sudoku_grid_layout = None
-
-        if self.number_buttons_layout:
-            for i in reversed(range(self.number_buttons_layout.count())):
-                widget = self.number_buttons_layout.itemAt(i).widget()
-                if widget is not None:
-                    widget.deleteLater()
-            self.number_buttons_layout = None
-
         for i in reversed(range(self.layout.count())):
             widget = self.layout.itemAt(i).widget()
-            if widget is not None:
+            if widget is self.game_view:
+                # Kept for the next game instead of being rebuilt
+                self.layout.removeWidget(widget)
+                widget.hide()
+            elif widget is not None:
                 widget.deleteLater()
 
     def show_difficulty_levels(self):
@@ -225,25 +279,33 @@ class SudokuApp(QWidget):
         self.layout.addWidget(back_button)
 
     def load_sudoku(self, difficulty):
-        board = generate_sudoku_board(difficulty)
-        display_sudoku(self, board, difficulty)
+        board, solution = self.puzzle_pool.get(difficulty)
+        display_sudoku(self, board, difficulty, solution=solution)
 
     def continue_game(self):
-        game_state = load_game_state(self.username)
+        self.run_io(load_game_state, self.username, then=self.resume_game)
+
+    def resume_game(self, game_state):
         if game_state:
-            self.start_time = game_state["time"]
-            self.errors = game_state["errors"]
-            self.remaining_counts = game_state["remaining_counts"]
-            board = game_state["board"]
-            difficulty = game_state["difficulty"]
-            user_input = game_state["user_input"]
-            display_sudoku(self, board, difficulty, start_time=self.start_time, errors=self.errors, remaining_counts=self.remaining_counts, user_input=user_input)
+            display_sudoku(self, game_state["puzzle"], game_state["difficulty"], solution=game_state["solution"],
+                           game_id=game_state["game_id"], errors=game_state["errors"], moves=game_state["moves"])
+
+    def closeEvent(self, event):
+        self.puzzle_pool.stop()
+        # Moves made since the last autosave are still only waiting on the debounce timer
+        if self.autosave_timer.isActive():
+            self.autosave_timer.stop()
+            self.autosave()
+        self.persistence.stop()
+        self.chart_renderer.stop()
+        if self.solve_budget:
+            self.solve_budget.cancel()
+        self.solver.stop()
+        super().closeEvent(event)
 
     def handle_number_click(self, number):
         if self.selected_cell:
-            self.selected_cell.setText(str(number))
-            self.remaining_counts[number] -= 1
-            self.update_remaining_counts()
+            self.game_view.board.enter_number(number)
 
     def update_remaining_counts(self):
         for i in range(1, 10):
@@ -253,27 +315,41 @@ class SudokuApp(QWidget):
     def show_game_history(self):
         self.clear_layout()
 
-        history = get_game_history(self.username)
-
         history_label = QLabel('Game History:', self)
         self.layout.addWidget(history_label)
+        query = query_game_history(self.username)
+        self.run_io(query.fetch, HISTORY_PAGE_SIZE, then=lambda rows: self.populate_game_history(query, rows))
 
-        if not history:
+    def populate_game_history(self, query, rows):
+        if not rows:
             no_history_label = QLabel('No game history available.', self)
             self.layout.addWidget(no_history_label)
         else:
-            history_table = QTableWidget(self)
-            history_table.setColumnCount(4)
-            history_table.setHorizontalHeaderLabels(['Date', 'Difficulty', 'Time (s)', 'Status'])
-            history_table.setRowCount(len(history))
-
-            for row, entry in enumerate(history):
-                history_table.setItem(row, 0, QTableWidgetItem(entry['date']))
-                history_table.setItem(row, 1, QTableWidgetItem(entry['difficulty']))
-                history_table.setItem(row, 2, QTableWidgetItem(str(entry['time'])))
-                history_table.setItem(row, 3, QTableWidgetItem(entry['status']))
-
-            history_table.resizeColumnsToContents()
+            model = HistoryTableModel(query, rows, lambda **params: query_game_history(self.username, **params), self.run_io, self)
+
+            filters = QWidget(self)
+            filters_layout = QHBoxLayout(filters)
+            difficulty_box = QComboBox(filters)
+            difficulty_box.addItem('All difficulties', None)
+            for difficulty in DIFFICULTIES:
+                difficulty_box.addItem(difficulty.capitalize(), difficulty)
+            status_box = QComboBox(filters)
+            status_box.addItem('All results', None)
+            status_box.addItem('Win', 'Win')
+            status_box.addItem('Lose', 'Lose')
+            apply_filter = lambda: model.set_filter(difficulty_box.currentData(), status_box.currentData())
+            difficulty_box.currentIndexChanged.connect(apply_filter)
+            status_box.currentIndexChanged.connect(apply_filter)
+            filters_layout.addWidget(difficulty_box)
+            filters_layout.addWidget(status_box)
+            self.layout.addWidget(filters)
+
+            history_table = QTableView(self)
+            history_table.setModel(model)
+            history_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+            # Matches the query's log order, so enabling sorting does not refetch
+            history_table.horizontalHeader().setSortIndicator(0, Qt.AscendingOrder)
+            history_table.setSortingEnabled(True)
             self.layout.addWidget(history_table)
 
         back_button = QPushButton('Back', self)
@@ -282,85 +358,43 @@ class SudokuApp(QWidget):
 
     def show_statistics(self):
         self.clear_layout()
+        self.run_io(get_statistics, self.username, then=self.populate_statistics)
 
-        history = get_game_history(self.username)
+    def show_statistics_chart(self, stats, chart_label):
+        # The last chart is kept and only re-rendered, off the GUI thread, when the user or stats version changes
+        key = (self.username, stats["version"])
+        if key in self.chart_cache:
+            chart_label.setPixmap(self.chart_cache[key])
+            return
 
-        if not history:
+        chart_label.setText('Drawing charts...')
+        screen_id = self.screen_id
+        def show(image):
+            pixmap = QPixmap.fromImage(image)
+            self.chart_cache = {key: pixmap}
+            if self.screen_id == screen_id:
+                chart_label.setPixmap(pixmap)
+        self.chart_renderer.submit('statistics_chart', render_statistics_chart, stats, callback=show)
+
+    def populate_statistics(self, stats):
+        if not stats["games"]:
             no_stats_label = QLabel('No statistics available.', self)
             self.layout.addWidget(no_stats_label)
         else:
-            total_games = len(history)
-            wins = sum(1 for game in history if game['status'] == 'Win')
-            losses = total_games - wins
-            best_times = {'easy': float('inf'), 'medium': float('inf'), 'hard': float('inf')}
-            worst_times = {'easy': 0, 'medium': 0, 'hard': 0}
-            total_times = {'easy': 0, 'medium': 0, 'hard': 0}
-            count_times = {'easy': 0, 'medium': 0, 'hard': 0}
-
-            for game in history:
-                if game['status'] == 'Win':
-                    if game['time'] < best_times[game['difficulty']]:
-                        best_times[game['difficulty']] = game['time']
-                    if game['time'] > worst_times[game['difficulty']]:
-                        worst_times[game['difficulty']] = game['time']
-                    total_times[game['difficulty']] += game['time']
-                    count_times[game['difficulty']] += 1
-
-            average_times = {k: (total_times[k] / count_times[k] if count_times[k] != 0 else 0) for k in total_times}
-            best_times = {k: (v if v != float('inf') else 0) for k, v in best_times.items()}
-            worst_times = {k: (v if v != 0 else 0) for k, v in worst_times.items()}
-
-            labels = 'Wins', 'Losses'
-            sizes = [wins, losses]
-            colors = ['#4CAF50', '#FF6347']
-            explode = (0.1, 0)
-
-            fig = Figure(figsize=(14, 8))
-            ax1 = fig.add_subplot(121)
-            ax1.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%', shadow=True, startangle=140)
-            ax1.axis('equal')
-            ax1.set_title('Win/Loss Ratio')
-
-            ax2 = fig.add_subplot(122)
-            difficulties = ['Easy', 'Medium', 'Hard']
-            best = [best_times['easy'], best_times['medium'], best_times['hard']]
-            worst = [worst_times['easy'], worst_times['medium'], worst_times['hard']]
-            avg = [average_times['easy'], average_times['medium'], average_times['hard']]
-            bar_width = 0.2
-            index = range(len(difficulties))
-
-            bars_best = ax2.bar(index, best, bar_width, label='Best Time')
-            bars_worst = ax2.bar([i + bar_width for i in index], worst, bar_width, label='Worst Time')
-            bars_avg = ax2.bar([i + 2 * bar_width for i in index], avg, bar_width, label='Average Time')
-
-            ax2.set_xlabel('Difficulty')
-            ax2.set_ylabel('Time (s)')
-            ax2.set_title('Best, Worst, and Average Times by Difficulty')
-            ax2.set_xticks([i + bar_width for i in index])
-            ax2.set_xticklabels(difficulties)
-            ax2.legend()
-
-            for bar in bars_best:
-                yval = bar.get_height()
-                ax2.text(bar.get_x() + bar.get_width()/2, yval, round(yval, 2), ha='center', va='bottom')
-
-            for bar in bars_worst:
-                yval = bar.get_height()
-                ax2.text(bar.get_x() + bar.get_width()/2, yval, round(yval, 2), ha='center', va='bottom')
-
-            for bar in bars_avg:
-                yval = bar.get_height()
-                ax2.text(bar.get_x() + bar.get_width()/2, yval, round(yval, 2), ha='center', va='bottom')
-
-            total_games_label = QLabel(f'Total Games: {total_games}', self)
-            wins_label = QLabel(f'Wins: {wins}', self)
-            losses_label = QLabel(f'Losses: {losses}', self)
+            median_times = {k: percentile_time(stats["difficulties"][k], 0.5) for k in ('easy', 'medium', 'hard')}
+            total_games_label = QLabel(f'Total Games: {stats["games"]}', self)
+            wins_label = QLabel(f'Wins: {stats["wins"]}', self)
+            losses_label = QLabel(f'Losses: {stats["losses"]}', self)
+            median_label = QLabel('Median Time: ' + ', '.join(f'{k.capitalize()} {v}s' for k, v in median_times.items()), self)
             self.layout.addWidget(total_games_label)
             self.layout.addWidget(wins_label)
             self.layout.addWidget(losses_label)
+            self.layout.addWidget(median_label)
 
-            canvas = FigureCanvas(fig)
-            self.layout.addWidget(canvas)
+            chart_label = QLabel(self)
+            chart_label.setAlignment(Qt.AlignCenter)
+            self.layout.addWidget(chart_label)
+            self.show_statistics_chart(stats, chart_label)
 
         back_button = QPushButton('Back', self)
         back_button.clicked.connect(self.show_main_menu)
@@ -1,21 +1,24 @@
 import json
 from datetime import datetime
 import os
+import struct
+from board import Board, DIFFICULTIES
+from history_store import HistoryStore
+from stats import empty_stats, record_game
+from storage import atomic_write, atomic_write_json, file_lock
+from sudoku import count_solutions, solve_sudoku
+from session import PLACE, CHECKPOINT
+from user_registry import UserRegistry
+
+user_registry = UserRegistry('users.log', legacy_path='users.json')
 
 def check_username(username):
-    try:
-        with open('users.json', 'r') as file:
-            users = json.load(file)
-    except FileNotFoundError:
-        users = []
+    return not user_registry.add(username)
+
+def login(username):
+    return check_username(username), has_game_state(username)
 
-    if username in users:
-        return True
-    else:
-        users.append(username)
-        with open('users.json', 'w') as file:
-            json.dump(users, file)
-        return False
+history_store = HistoryStore('history.log', legacy_path='history.json')
 
 def save_game_history(username, difficulty, time, status):
     history_entry = {
@@ -24,55 +27,173 @@ def save_game_history(username, difficulty, time, status):
         "time": time,
         "status": status
     }
+    # The lock keeps other app instances from appending between our read and write of the aggregate
+    with file_lock(f'{username}_stats.lock'):
+        stats = _load_statistics(username)
+        history_store.append(username, history_entry)
+        record_game(stats, difficulty, time, status)
+        stats["history_size"] = history_store.size(username)
+        atomic_write_json(f'{username}_stats.json', stats)
+
+def get_game_history(username):
+    return history_store.get(username)
+
+def query_game_history(username, difficulty=None, status=None, sort="date", descending=False):
+    return history_store.query(username, difficulty, status, sort, descending)
 
+def get_statistics(username):
+    with file_lock(f'{username}_stats.lock'):
+        return _load_statistics(username)
+
+def _load_statistics(username):
+    # The aggregate records how much history it covers; a crash between the history append and the
+    # aggregate write leaves them apart, and then the aggregate is rebuilt
+    history_size = history_store.size(username)
     try:
-        with open('history.json', 'r') as file:
-            history = json.load(file)
-    except FileNotFoundError:
-        history = {}
+        with open(f'{username}_stats.json', 'r') as file:
+            stats = json.load(file)
+        if stats.get("history_size") == history_size:
+            return stats
+    except (FileNotFoundError, ValueError):
+        pass
 
-    if username not in history:
-        history[username] = []
+    # Missing or stale: build it once from the recorded history and keep it, so later visits stay O(1)
+    stats = empty_stats()
+    for entry in get_game_history(username):
+        record_game(stats, entry["difficulty"], entry["time"], entry["status"])
+    stats["history_size"] = history_size
+    atomic_write_json(f'{username}_stats.json', stats)
+    return stats
 
-    history[username].append(history_entry)
+# Binary save, version 3: a header and the puzzle record (packed clues, then the packed solution or
+# zeros when unknown) written once per game, followed by one fixed-size record per logged move,
+# appended as the game goes on.
+GAME_STATE_MAGIC = b'SDKS'
+GAME_STATE_VERSION = 3
+# magic, version, difficulty, game id, errors made before the move log
+GAME_STATE_HEADER = struct.Struct('<4sBBIH')
+GAME_STATE_BASE_SIZE = GAME_STATE_HEADER.size + 82
+MOVE_RECORD = struct.Struct('<BBBI')
 
-    with open('history.json', 'w') as file:
-        json.dump(history, file, indent=4)
+def game_state_path(username):
+    return f'{username}_game_state.sav'
 
-def get_game_history(username):
-    try:
-        with open('history.json', 'r') as file:
-            history = json.load(file)
-    except FileNotFoundError:
-        return []
+def snapshot_game_state(app, difficulty):
+    # Stamps the elapsed time into the move log, so this half of saving stays on the GUI thread
+    session = app.session
+    session.checkpoint(app.start_time)
+    return {
+        "difficulty": difficulty,
+        "game_id": session.game_id,
+        "errors": session.base_errors,
+        "puzzle": session.puzzle,
+        "solution": session.solution,
+        "moves": list(session.log),
+    }
 
-    return history.get(username, [])
+def encode_game_state(game_state):
+    header = GAME_STATE_HEADER.pack(GAME_STATE_MAGIC, GAME_STATE_VERSION, DIFFICULTIES.index(game_state["difficulty"]),
+                                    game_state["game_id"], game_state["errors"])
+    solution = game_state["solution"] or Board()
+    return header + game_state["puzzle"].pack() + solution.pack() + encode_moves(game_state["moves"])
 
-def save_game_state(app, board, difficulty):
-    game_state = {
-        "username": app.username,
+def encode_moves(moves):
+    return b''.join(MOVE_RECORD.pack(*move) for move in moves)
+
+def decode_game_state(data):
+    magic, version, difficulty, game_id, errors = GAME_STATE_HEADER.unpack_from(data)
+    if magic != GAME_STATE_MAGIC or version != GAME_STATE_VERSION or len(data) < GAME_STATE_BASE_SIZE:
+        raise ValueError('not a saved game')
+
+    # A torn record at the end, from an append cut short, is ignored
+    end = len(data) - (len(data) - GAME_STATE_BASE_SIZE) % MOVE_RECORD.size
+    offset = GAME_STATE_HEADER.size
+    solution = Board.unpack(data[offset + 41:GAME_STATE_BASE_SIZE])
+    return {
+        "difficulty": DIFFICULTIES[difficulty],
+        "game_id": game_id,
+        "errors": errors,
+        "puzzle": Board.unpack(data[offset:offset + 41]),
+        "solution": solution if solution.is_full() else None,
+        "moves": list(MOVE_RECORD.iter_unpack(data[GAME_STATE_BASE_SIZE:end])),
+    }
+
+def from_snapshot(difficulty, time, errors, board, user_input):
+    # Whole-board JSON saves become a puzzle plus a log: cells the user could still edit are replayed
+    # as placements, everything else counts as a clue
+    user_input = user_input or [[False] * 9 for _ in range(9)]
+    puzzle = board.copy()
+    moves = []
+    for i, num in enumerate(board.cells):
+        if num and user_input[i // 9][i % 9]:
+            puzzle.cells[i] = 0
+            moves.append((PLACE, i, num, time))
+    moves.append((CHECKPOINT, 0, 0, time))
+    return {
         "difficulty": difficulty,
-        "time": app.start_time,
-        "errors": app.errors,
-        "board": [[cell.text() if cell.text() else 0 for cell in row] for row in app.cells],
-        "user_input": [[not cell.isReadOnly() for cell in row] for row in app.cells],
-        "remaining_counts": app.remaining_counts
+        "game_id": None,
+        "errors": errors,
+        "puzzle": puzzle,
+        "solution": None,
+        "moves": moves,
     }
 
-    with open(f'{app.username}_game_state.json', 'w') as file:
-        json.dump(game_state, file, indent=4)
+def derive_solution(game_state):
+    # Saves without a stored solution: solve the clues once, here on the I/O thread. Puzzles from the
+    # old generator can have several solutions; for those any one grid would reject correct moves,
+    # so no solution is kept and the session checks moves against the rules instead.
+    clues = game_state["puzzle"]
+    solution = clues.copy()
+    game_state["solution"] = solution if count_solutions(clues) == 1 and solve_sudoku(solution) else None
+    return game_state
+
+def save_game_state(username, game_state):
+    # Same game as the file holds: append only the moves it does not have yet. Anything else
+    # (a new game, an older format, a damaged file) is replaced whole.
+    path = game_state_path(username)
+    moves = game_state["moves"]
+    try:
+        with open(path, 'r+b') as file:
+            magic, version, _, game_id, _ = GAME_STATE_HEADER.unpack(file.read(GAME_STATE_HEADER.size))
+            size = os.fstat(file.fileno()).st_size
+            saved = (size - GAME_STATE_BASE_SIZE) // MOVE_RECORD.size
+            if (magic, version, game_id) == (GAME_STATE_MAGIC, GAME_STATE_VERSION, game_state["game_id"]) and 0 <= saved <= len(moves):
+                end = GAME_STATE_BASE_SIZE + saved * MOVE_RECORD.size
+                if size != end:
+                    file.truncate(end)
+                file.seek(end)
+                file.write(encode_moves(moves[saved:]))
+                file.flush()
+                os.fsync(file.fileno())
+                return
+    except (FileNotFoundError, struct.error):
+        pass
+    atomic_write(path, encode_game_state(game_state))
 
 def load_game_state(username):
+    try:
+        with open(game_state_path(username), 'rb') as file:
+            return decode_game_state(file.read())
+    except FileNotFoundError:
+        pass
+    except (ValueError, IndexError, struct.error):
+        return None
+
+    # Saves written before the binary format
     try:
         with open(f'{username}_game_state.json', 'r') as file:
             game_state = json.load(file)
-            game_state["board"] = [[int(cell) if cell != 0 else 0 for cell in row] for row in game_state["board"]]
-            return game_state
+        return derive_solution(from_snapshot(game_state["difficulty"], game_state["time"], game_state["errors"],
+                                             Board.from_rows(game_state["board"]), game_state.get("user_input")))
     except FileNotFoundError:
         return None
 
+def has_game_state(username):
+    return os.path.exists(game_state_path(username)) or os.path.exists(f'{username}_game_state.json')
+
 def delete_game_state(username):
-    try:
-        os.remove(f'{username}_game_state.json')
-    except FileNotFoundError:
-        pass
\ No newline at end of file
+    for path in (game_state_path(username), f'{username}_game_state.json'):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
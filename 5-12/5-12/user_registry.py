@@ -0,0 +1,77 @@
+# user_registry.py
+import json
+import os
+import threading
+from storage import atomic_write, file_lock
+
+class UserRegistry:
+    # One JSON-encoded username per line, kept in memory as the raw encoded lines so loading needs no
+    # parsing. Appends happen under an exclusive file lock, and other processes' registrations are
+    # picked up by reading only the bytes added since the last read.
+    def __init__(self, path='users.log', legacy_path='users.json'):
+        self.path = path
+        self.lock_path = f'{path}.lock'
+        self.legacy_path = legacy_path
+        self._users = set()
+        self._end = 0
+        self._migrated = False
+        self._lock = threading.Lock()
+
+    def __contains__(self, username):
+        key = json.dumps(username).encode()
+        with self._lock:
+            if key in self._users:
+                return True
+            self._migrate_legacy()
+            self._catch_up()
+            return key in self._users
+
+    def __len__(self):
+        with self._lock:
+            self._migrate_legacy()
+            self._catch_up()
+            return len(self._users)
+
+    def add(self, username):
+        # Returns True if the user was newly registered, False if they already existed
+        if username in self:
+            return False
+        key = json.dumps(username).encode()
+        with self._lock, file_lock(self.lock_path):
+            self._catch_up()
+            if key in self._users:
+                return False
+            with open(self.path, 'ab') as file:
+                file.write(key + b'\n')
+                file.flush()
+                os.fsync(file.fileno())
+            self._catch_up()
+            return True
+
+    def _catch_up(self):
+        if os.path.getsize(self.path) == self._end:
+            return
+
+        with open(self.path, 'rb') as file:
+            file.seek(self._end)
+            data = file.read()
+        # Ignore a line another process has not finished writing yet
+        complete = data.rfind(b'\n') + 1
+        self._users.update(data[:complete].splitlines())
+        self._end += complete
+
+    def _migrate_legacy(self):
+        if self._migrated:
+            return
+        self._migrated = True
+        if os.path.exists(self.path):
+            return
+        with file_lock(self.lock_path):
+            if os.path.exists(self.path):
+                return
+            try:
+                with open(self.legacy_path, 'r') as file:
+                    users = json.load(file)
+            except FileNotFoundError:
+                users = []
+            atomic_write(self.path, b''.join((json.dumps(username) + '\n').encode() for username in users))